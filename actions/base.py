@@ -6,7 +6,8 @@ from enum import Enum, auto
 from typing import Optional, Tuple, Protocol
 
 def wrap_pi(a: float) -> float:
-    return (a + math.pi) % (2.0 * math.pi) - math.pi
+    # IEEE remainder: 1 lời gọi libm, nhanh & chính xác hơn fmod với |a| lớn
+    return math.remainder(a, math.tau)
 
 class Status(Enum):
     RUNNING = auto()
@@ -1,11 +1,18 @@
 # actions/planning.py
 from __future__ import annotations
 
-import math, random
+import math
+
+import numpy as np
 from dataclasses import dataclass
 from typing import Dict, List, Tuple, Optional, Iterable
 from enum import IntEnum
 
+try:
+    from numba import njit
+except ImportError:     # numba là tuỳ chọn — không có thì dùng đường NumPy thuần
+    njit = None
+
 from models.world import World
 from models.team import Team
 from models.robot import Robot
@@ -27,13 +34,20 @@ class PlayingAction(IntEnum):
     GoalKeeping = 11
     Goto = 12
 
-@dataclass
+# Hằng int thuần cho hot-loop của planner (so sánh IntEnum đi qua __eq__ chậm hơn)
+_MWB = int(PlayingAction.MovingWithBall)
+_SHOOT = int(PlayingAction.TryToShoot)
+_PASS = int(PlayingAction.TryToPass)
+_DEEP_PASS = int(PlayingAction.TryToDeepPass)
+_DRIBBLE = int(PlayingAction.TryToDribble)
+
+@dataclass(slots=True)
 class Location:
     x: float
     y: float
     theta: float = 0.0
 
-@dataclass
+@dataclass(slots=True)
 class ActionQValue:
     imagined_robot_id: int
     imagined_robot_action: int                     # PlayingAction (long)
@@ -51,6 +65,32 @@ class ActionQValue:
         self.location_action_target_envisagee = loc
 
 
+# Pool tái sử dụng ActionQValue — planner tạo/huỷ hàng trăm ứng viên mỗi tick
+_AQV_POOL: List[ActionQValue] = []
+
+def _new_aqv(robot_id: int, subtype: int, reward: float, prob: float) -> ActionQValue:
+    """Lấy một ActionQValue từ pool (hoặc cấp mới), reset đủ các trường."""
+    if _AQV_POOL:
+        a = _AQV_POOL.pop()
+        a.imagined_robot_id = robot_id
+        a.imagined_robot_action = PlayingAction.MovingWithBall
+        a.action_subtype = subtype
+        a.action_reward = reward
+        a.success_probability = prob
+        a.location_action_envisagee = None
+        a.location_action_target_envisagee = None
+        a.is_current_action_loc = False
+        return a
+    return ActionQValue(robot_id, PlayingAction.MovingWithBall, action_subtype=subtype,
+                        action_reward=reward, success_probability=prob)
+
+def recycle_actions(actions: List[ActionQValue], keep: Optional[ActionQValue] = None) -> None:
+    """Trả các ứng viên không được chọn về pool (giữ lại `keep` nếu có)."""
+    for a in actions:
+        if a is not keep:
+            _AQV_POOL.append(a)
+
+
 # ===== Tham số thực thi =====
 EXEC_DIST = 0.20            # m: phải tới gần điểm envisagée mới bắn/chuyền
 EXEC_ANG_DEG = 25.0         # độ: sai số hướng cho phép khi bắn/chuyền (nới lỏng)
@@ -59,13 +99,17 @@ SHOT_SPEED = 7.5            # m/s
 OPP_MAX_SPEED = 2.5         # m/s (giả định đối thủ tối đa)
 BALL_RADIUS = 0.11          # m (size 5 ~ đường kính 0.22)
 
+# Lưới goal_y quét khi sút/chuyền sâu (±1 m, bước 0.25) — dựng 1 lần ở module
+_GOAL_Y_GRID = np.linspace(-1.0, 1.0, 9)
+
 def _angle_wrap(a: float) -> float:
-    return (a + math.pi) % (2.0 * math.pi) - math.pi
+    return math.remainder(a, math.tau)
 
 def can_execute_at(robot: Robot, target: Location,
                    pos_tol: float = EXEC_DIST, ang_tol_deg: float = EXEC_ANG_DEG) -> bool:
     """Robot đã ở gần điểm envisagée & quay đúng hướng chưa?"""
-    if math.hypot(robot.x - target.x, robot.y - target.y) > pos_tol:
+    dx, dy = robot.x - target.x, robot.y - target.y
+    if dx * dx + dy * dy > pos_tol * pos_tol:   # so sánh bình phương, khỏi sqrt
         return False
     err = _angle_wrap(target.theta - robot.theta)
     return abs(err) <= math.radians(ang_tol_deg)
@@ -78,8 +122,9 @@ def _place_ball_in_front(robot: Robot, gap: float = 0.02) -> Tuple[float, float]
 
 def _set_cooldown(world: World, seconds: float) -> None:
     """Đặt cooldown bắt bóng nếu World có thuộc tính này."""
-    if hasattr(world, "kick_cooldown"):
-        setattr(world, "kick_cooldown", float(seconds))
+    # getattr 1 lần rẻ hơn hasattr (hasattr = lookup + bắt exception)
+    if getattr(world, "kick_cooldown", None) is not None:
+        world.kick_cooldown = float(seconds)
 
 def exec_shoot(world: World, team: Team, robot: Robot,
                speed: float = SHOT_SPEED) -> None:
@@ -90,14 +135,16 @@ def exec_shoot(world: World, team: Team, robot: Robot,
     robot.has_ball = False
 
     # 2) hướng tới khung thành đối phương (y=0)
-    goal_x = world.half_w if team.side == "left" else -world.half_w
-    ang = math.atan2(0.0 - by, goal_x - bx)
+    goal_x = team._side_sign * world.half_w
+    dx, dy = goal_x - bx, 0.0 - by
 
-    # 3) đặt vận tốc bóng
-    if hasattr(world.ball, "kick"):
-        world.ball.kick(speed, ang)
+    # 3) đặt vận tốc bóng — đường fallback chuẩn hoá trực tiếp, khỏi atan2+cos+sin
+    kick = getattr(world.ball, "kick", None)
+    if kick is not None:
+        kick(speed, math.atan2(dy, dx))
     else:
-        world.ball.set_vel(speed * math.cos(ang), speed * math.sin(ang))
+        inv = speed / max(1e-9, math.hypot(dx, dy))
+        world.ball.set_vel(dx * inv, dy * inv)
 
     # 4) cooldown để không bắt lại ngay
     _set_cooldown(world, 0.25)
@@ -110,16 +157,22 @@ def exec_pass(world: World, team: Team, robot: Robot,
     robot.has_ball = False
 
     tx, ty = to_xy
-    ang = math.atan2(ty - by, tx - bx)
-    if hasattr(world.ball, "kick"):
-        world.ball.kick(speed, ang)
+    dx, dy = tx - bx, ty - by
+    kick = getattr(world.ball, "kick", None)
+    if kick is not None:
+        kick(speed, math.atan2(dy, dx))
     else:
-        world.ball.set_vel(speed * math.cos(ang), speed * math.sin(ang))
+        inv = speed / max(1e-9, math.hypot(dx, dy))
+        world.ball.set_vel(dx * inv, dy * inv)
 
     _set_cooldown(world, 0.25)
 
 
 # ===== Rosace generator (DetermineActionPossibleLocations) =====
+# RNG dùng chung cho jitter rosace — rút mẫu theo batch rẻ hơn random.random() từng lần
+_RNG = np.random.default_rng()
+
+
 def determine_action_possible_locations(
     base_location: Location,
     rosace_location: Optional[Location],
@@ -127,57 +180,121 @@ def determine_action_possible_locations(
     nb_pts_test_base: int = 5,
     nb_pts_test_rosace: int = 3,
     rosace_small_radii: Iterable[float] = (0.2,)
-) -> List[Tuple[Location, bool]]:
+) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Trả về danh sách [(Location, is_current)]:
-    - Rải ngẫu nhiên nb_pts_test_base điểm quanh base_location trong bán kính ~radius
-    - Nếu có rosace_location: thêm chính nó (is_current=True) và 1 vòng nhỏ nb_pts_test_rosace xung quanh
+    Trả về (pts, is_current):
+    - pts: ndarray (N,3) các hàng (x, y, theta) — vector hoá bằng NumPy,
+      tránh cấp phát Location từng điểm trong vòng lặp Python
+    - is_current: ndarray bool (N,) — True tại điểm “đang theo”
+    Nội dung: nb_pts_test_base điểm jitter quanh base_location trong bán kính ~radius;
+    nếu có rosace_location: thêm chính nó (is_current=True) và 1 vòng nhỏ xung quanh.
     """
-    pts: List[Tuple[Location, bool]] = []
+    blocks: List[np.ndarray] = []
 
-    # Vòng base (random jitter)
-    for _ in range(nb_pts_test_base):
-        x = base_location.x + (random.random() - 0.5) * radius
-        y = base_location.y + (random.random() - 0.5) * radius
-        pts.append((Location(x, y, 0.0), False))
+    # Vòng base (random jitter) — sinh cả mảng một lần
+    base = np.empty((nb_pts_test_base, 3))
+    base[:, 0] = base_location.x + (_RNG.random(nb_pts_test_base) - 0.5) * radius
+    base[:, 1] = base_location.y + (_RNG.random(nb_pts_test_base) - 0.5) * radius
+    base[:, 2] = 0.0
+    blocks.append(base)
 
     if rosace_location is not None:
         # điểm “đang theo”
-        pts.append((Location(rosace_location.x, rosace_location.y, rosace_location.theta), True))
+        blocks.append(np.array([[rosace_location.x, rosace_location.y, rosace_location.theta]]))
 
         # vòng nhỏ quanh rosace_location
+        nb = max(1, nb_pts_test_rosace)
+        k = np.arange(nb)
         for r_small in rosace_small_radii:
-            for k in range(max(1, nb_pts_test_rosace)):
-                ang = (2.0 * math.pi * k / max(1, nb_pts_test_rosace)) \
-                      + (random.random() - 0.5) * (math.pi / max(1, nb_pts_test_rosace))
-                dist = r_small + (random.random() - 0.5) * r_small
-                x = rosace_location.x + dist * math.cos(ang)
-                y = rosace_location.y + dist * math.sin(ang)
-                pts.append((Location(x, y, rosace_location.theta), False))
-
-    return pts
+            ang = 2.0 * np.pi * k / nb + (_RNG.random(nb) - 0.5) * (np.pi / nb)
+            dist = r_small + (_RNG.random(nb) - 0.5) * r_small
+            ring = np.empty((nb, 3))
+            ring[:, 0] = rosace_location.x + dist * np.cos(ang)
+            ring[:, 1] = rosace_location.y + dist * np.sin(ang)
+            ring[:, 2] = rosace_location.theta
+            blocks.append(ring)
+
+    pts = np.concatenate(blocks, axis=0) if len(blocks) > 1 else blocks[0]
+    is_current = np.zeros(pts.shape[0], dtype=bool)
+    if rosace_location is not None:
+        is_current[nb_pts_test_base] = True
+    return pts, is_current
 
 
 # ===== Heuristics & geometry helpers =====
 def _attack_sign(team: Team) -> int:
-    return +1 if team.side == "left" else -1
+    return team._side_sign       # cache trên Team, khỏi so sánh chuỗi
 
 def _goal_x_for(team: Team, world: World) -> float:
-    return world.half_w if team.side == "left" else -world.half_w
+    return team._side_sign * world.half_w
 
 def _dist(a: Tuple[float, float], b: Tuple[float, float]) -> float:
     return math.hypot(a[0] - b[0], a[1] - b[1])
 
-def _nearest_opponent_dist(world: World, team: Team, x: float, y: float) -> float:
-    best = float("inf")
-    opp = world.team_right if team.side == "left" else world.team_left
-    for r in opp.robots.values():
-        if not r.active:
-            continue
-        d = _dist((x, y), (r.x, r.y))
-        if d < best:
-            best = d
-    return best
+def _opponents_xy(world: World, team: Team) -> np.ndarray:
+    """Toạ độ (N,2) các đối thủ active — dựng MỘT lần mỗi lượt planner rồi truyền xuống."""
+    opp = world.team_right if team._side_sign > 0 else world.team_left
+    return np.array([[o.x, o.y] for o in opp.robots.values() if o.active],
+                    dtype=float).reshape(-1, 2)
+
+class _OpponentGrid:
+    """
+    Lưới băm đều trên vị trí đối thủ (ô ~1 m) — dựng MỘT lần mỗi lượt planner.
+    Truy vấn nearest mở rộng theo vành ô quanh điểm hỏi, dừng sớm khi không
+    thể có điểm gần hơn; với N đối thủ lớn chi phí mỗi truy vấn là O(k).
+    """
+    __slots__ = ("cell", "bins", "opp_xy")
+
+    def __init__(self, opp_xy: np.ndarray, cell: float = 1.0):
+        self.opp_xy = opp_xy
+        self.cell = cell
+        self.bins: Dict[Tuple[int, int], List[int]] = {}
+        for i in range(opp_xy.shape[0]):
+            key = (int(math.floor(opp_xy[i, 0] / cell)), int(math.floor(opp_xy[i, 1] / cell)))
+            self.bins.setdefault(key, []).append(i)
+
+    def nearest_dist(self, x: float, y: float) -> float:
+        if not self.bins:
+            return float("inf")
+        c = self.cell
+        kx = int(math.floor(x / c))
+        ky = int(math.floor(y / c))
+        # vành tối đa đủ phủ mọi ô có đối thủ
+        max_ring = max(max(abs(bx - kx), abs(by - ky)) for (bx, by) in self.bins)
+        best_sq = float("inf")
+        opp = self.opp_xy
+        for ring in range(max_ring + 1):
+            for bx in range(kx - ring, kx + ring + 1):
+                for by in range(ky - ring, ky + ring + 1):
+                    if max(abs(bx - kx), abs(by - ky)) != ring:
+                        continue
+                    idxs = self.bins.get((bx, by))
+                    if not idxs:
+                        continue
+                    for i in idxs:
+                        dx = opp[i, 0] - x
+                        dy = opp[i, 1] - y
+                        d2 = dx * dx + dy * dy
+                        if d2 < best_sq:
+                            best_sq = d2
+            # mọi điểm ở vành > ring cách ít nhất ring*cell
+            if best_sq <= (ring * c) * (ring * c):
+                break
+        return math.sqrt(best_sq)
+
+
+def _nearest_opponent_dist(world: World, team: Team, x: float, y: float,
+                           opp_xy: Optional[np.ndarray] = None,
+                           opp_grid: Optional[_OpponentGrid] = None) -> float:
+    if opp_grid is not None:
+        return opp_grid.nearest_dist(x, y)
+    if opp_xy is None:
+        opp_xy = _opponents_xy(world, team)
+    if opp_xy.shape[0] == 0:
+        return float("inf")
+    dx = opp_xy[:, 0] - x
+    dy = opp_xy[:, 1] - y
+    return float(np.sqrt(np.min(dx * dx + dy * dy)))
 
 def _seg_point_distance(p0: Tuple[float, float], p1: Tuple[float, float], p: Tuple[float, float]) -> Tuple[float, float]:
     x0, y0 = p0; x1, y1 = p1; x, y = p
@@ -190,30 +307,62 @@ def _seg_point_distance(p0: Tuple[float, float], p1: Tuple[float, float], p: Tup
     proj = (x0 + t * vx, y0 + t * vy)
     return math.hypot(x - proj[0], y - proj[1]), t
 
+def _seg_points_distance(p0: Tuple[float, float], p1: Tuple[float, float],
+                         pts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Bản vector hoá của _seg_point_distance: (d, t) cho cả mảng điểm (N,2)."""
+    x0, y0 = p0
+    x1, y1 = p1
+    vx, vy = x1 - x0, y1 - y0
+    L2 = vx * vx + vy * vy
+    dx = pts[:, 0] - x0
+    dy = pts[:, 1] - y0
+    if L2 <= 1e-12:
+        return np.sqrt(dx * dx + dy * dy), np.zeros(pts.shape[0])
+    t = np.clip((dx * vx + dy * vy) / L2, 0.0, 1.0)
+    ex = dx - t * vx
+    ey = dy - t * vy
+    return np.sqrt(ex * ex + ey * ey), t
+
+def _seg_points_dist_sq_batch(p0: Tuple[float, float], p1s: np.ndarray,
+                              pts: np.ndarray) -> np.ndarray:
+    """Bình phương khoảng cách đoạn-điểm cho M đoạn (chung gốc p0) × N điểm → (M, N).
+
+    Trả về bình phương: so sánh/ngưỡng không cần sqrt, caller tự khai căn khi cần.
+    """
+    x0, y0 = p0
+    vx = p1s[:, 0] - x0                              # (M,)
+    vy = p1s[:, 1] - y0
+    L2 = np.maximum(vx * vx + vy * vy, 1e-12)
+    dx = pts[:, 0] - x0                              # (N,)
+    dy = pts[:, 1] - y0
+    t = np.clip((vx[:, None] * dx + vy[:, None] * dy) / L2[:, None], 0.0, 1.0)  # (M,N)
+    ex = dx - t * vx[:, None]
+    ey = dy - t * vy[:, None]
+    return ex * ex + ey * ey
+
 def ray_clearance_metric(world: World, team: Team,
                          p0: Tuple[float, float], p1: Tuple[float, float],
-                         safety: float = 0.30) -> Tuple[float, float]:
-    opp = world.team_right if team.side == "left" else world.team_left
-    min_d = float("inf")
-    covered_spans = 0
+                         safety: float = 0.30,
+                         opp_xy: Optional[np.ndarray] = None) -> Tuple[float, float]:
+    if opp_xy is None:
+        opp_xy = _opponents_xy(world, team)
     L = max(1e-6, math.hypot(p1[0] - p0[0], p1[1] - p0[1]))
-    for o in opp.robots.values():
-        if not o.active:
-            continue
-        d, t = _seg_point_distance(p0, p1, (o.x, o.y))
-        if d < min_d:
-            min_d = d
-        if 0.0 <= t <= 1.0 and d <= safety:
-            covered_spans += 1
+    if opp_xy.shape[0] == 0:
+        return (L, 0.0)
+    # làm việc trong không gian bình phương — chỉ khai căn 1 lần cho min
+    d2 = _seg_points_dist_sq_batch(p0, np.array([p1]), opp_xy)[0]
+    min_d = math.sqrt(float(d2.min()))
+    covered_spans = int(np.count_nonzero(d2 <= safety * safety))
     cover = min(1.0, covered_spans * (0.6 / (L + 0.1)))
-    if min_d == float("inf"):
-        min_d = L
     return (min_d, cover)
 
 
 # ===== Scoring =====
 def evaluate_shoot(world: World, team: Team, shoot_pos: Location,
-                   goal_y: float, respect_3m: bool, robot_start: Location) -> Tuple[float, float]:
+                   goal_y: float, respect_3m: bool, robot_start: Location,
+                   opp_xy: Optional[np.ndarray] = None,
+                   sign: Optional[int] = None,
+                   goal_x: Optional[float] = None) -> Tuple[float, float]:
     """
     Port từ C#: reward & success_prob của cú sút, gồm:
       - Xác suất di chuyển tới điểm sút không bị cắt (teammate vs opponent)
@@ -221,20 +370,22 @@ def evaluate_shoot(world: World, team: Team, shoot_pos: Location,
       - Phạt/ thưởng theo 3m, quãng đường chuẩn bị, và mở góc cầu môn
       - Cấm sút từ nửa sân nhà
     """
-    sign = _attack_sign(team)
-    goal_x = _goal_x_for(team, world)
+    if sign is None:
+        sign = _attack_sign(team)
+    if goal_x is None:
+        goal_x = _goal_x_for(team, world)
 
     # --- base reward: giống C#: teamStrategyParameters.BaseRewardShoot ~ 1.0
     reward = 1.0
     prob = 1.0
 
     # --- proba di chuyển tới điểm sút không bị cắt
-    opp = world.team_right if team.side == "left" else world.team_left
-    interceptors = [(o.x, o.y) for o in opp.robots.values() if o.active]
+    if opp_xy is None:
+        opp_xy = _opponents_xy(world, team)
 
     p_move = evaluate_success_probability_absence_interception(
         (robot_start.x, robot_start.y), (shoot_pos.x, shoot_pos.y),
-        interceptors, vitesse_deplacement=3.0, opponent_max_speed=3.0,
+        opp_xy, vitesse_deplacement=3.0, opponent_max_speed=3.0,
         inter_centre_distance=0.55, temps_reaction_opponent=0.1
     )
     prob *= p_move
@@ -242,7 +393,7 @@ def evaluate_shoot(world: World, team: Team, shoot_pos: Location,
     # --- proba cú sút không bị cắt
     p_shot = evaluate_success_probability_absence_interception(
         (shoot_pos.x, shoot_pos.y), (goal_x, goal_y),
-        interceptors, vitesse_deplacement=15.0, opponent_max_speed=3.0,
+        opp_xy, vitesse_deplacement=15.0, opponent_max_speed=3.0,
         inter_centre_distance=0.40, temps_reaction_opponent=0.1
     )
     prob *= p_shot
@@ -255,7 +406,7 @@ def evaluate_shoot(world: World, team: Team, shoot_pos: Location,
     reward *= linear_in_interval(d_carry, 0.0, 3.0, 1.0, 0.8)
 
     # --- mở góc cầu môn (0.5..1.0)
-    reward *= evaluate_goal_opening_angle(world, team, shoot_pos)
+    reward *= evaluate_goal_opening_angle(world, team, shoot_pos, goal_x=goal_x)
 
     # --- không cho sút từ nửa sân nhà
     if shoot_pos.x * sign <= 0.0:
@@ -265,13 +416,73 @@ def evaluate_shoot(world: World, team: Team, shoot_pos: Location,
     return (max(0.0, reward), max(0.0, min(1.0, prob)))
 
 
-def evaluate_pass(world: World, team: Team, pass_from: Location, teammate: Robot) -> Tuple[float, float]:
+def evaluate_shoot_vec(world: World, team: Team, shoot_pos: Location,
+                       goal_ys: np.ndarray, respect_3m: bool, robot_start: Location,
+                       opp_xy: Optional[np.ndarray] = None,
+                       sign: Optional[int] = None,
+                       goal_x: Optional[float] = None) -> Tuple[float, np.ndarray]:
+    """
+    Bản vector hoá của evaluate_shoot trên cả lưới goal_y.
+    Reward không phụ thuộc goal_y nên trả về (reward, probs[G]) — các phần chung
+    (p_move, 3m, góc mở) chỉ tính MỘT lần thay vì lặp lại 9 lần.
+    """
+    if sign is None:
+        sign = _attack_sign(team)
+    if goal_x is None:
+        goal_x = _goal_x_for(team, world)
+    if opp_xy is None:
+        opp_xy = _opponents_xy(world, team)
+
+    reward = 1.0
+
+    # --- proba di chuyển tới điểm sút không bị cắt (chung cho mọi goal_y)
+    p_move = evaluate_success_probability_absence_interception(
+        (robot_start.x, robot_start.y), (shoot_pos.x, shoot_pos.y),
+        opp_xy, vitesse_deplacement=3.0, opponent_max_speed=3.0,
+        inter_centre_distance=0.55, temps_reaction_opponent=0.1
+    )
+
+    # --- proba cú sút không bị cắt — vector hoá trên cả lưới goal_y
+    cibles = np.empty((goal_ys.shape[0], 2))
+    cibles[:, 0] = goal_x
+    cibles[:, 1] = goal_ys
+    p_shot = _interception_prob_vec(
+        (shoot_pos.x, shoot_pos.y), cibles, opp_xy,
+        vitesse_deplacement=15.0, opponent_max_speed=3.0,
+        inter_centre_distance=0.40, temps_reaction_opponent=0.1
+    )
+    probs = np.clip(p_move * p_shot, 0.0, 1.0)
+
+    # --- rule 3m & quãng chuẩn bị & góc mở (đều không phụ thuộc goal_y)
+    d_carry = _dist((robot_start.x, robot_start.y), (shoot_pos.x, shoot_pos.y))
+    reward *= linear_in_interval(d_carry, 2.5, 3.0, 1.0, 0.0)
+    reward *= linear_in_interval(d_carry, 0.0, 3.0, 1.0, 0.8)
+    reward *= evaluate_goal_opening_angle(world, team, shoot_pos, goal_x=goal_x)
+
+    if shoot_pos.x * sign <= 0.0:
+        reward = 0.0
+
+    return (max(0.0, reward), probs)
+
+
+def evaluate_pass(world: World, team: Team, pass_from: Location, teammate: Robot,
+                  opp_xy: Optional[np.ndarray] = None,
+                  opp_grid: Optional[_OpponentGrid] = None) -> Tuple[float, float]:
+    return _evaluate_pass_xy(world, team, pass_from, teammate.x, teammate.y,
+                             opp_xy=opp_xy, opp_grid=opp_grid)
+
+def _evaluate_pass_xy(world: World, team: Team, pass_from: Location,
+                      tx: float, ty: float,
+                      opp_xy: Optional[np.ndarray] = None,
+                      opp_grid: Optional[_OpponentGrid] = None) -> Tuple[float, float]:
+    """Lõi của evaluate_pass trên toạ độ nhận (tx, ty) — không cần đối tượng Robot."""
     p0 = (pass_from.x, pass_from.y)
-    p1 = (teammate.x, teammate.y)
+    p1 = (tx, ty)
     d = _dist(p0, p1)
-    space = _nearest_opponent_dist(world, team, teammate.x, teammate.y)
+    space = _nearest_opponent_dist(world, team, tx, ty,
+                                   opp_xy=opp_xy, opp_grid=opp_grid)
 
-    min_d, cover = ray_clearance_metric(world, team, p0, p1, safety=0.30)
+    min_d, cover = ray_clearance_metric(world, team, p0, p1, safety=0.30, opp_xy=opp_xy)
     t_ball = d / max(1e-6, PASS_SPEED)
     t_opp = min_d / max(1e-6, OPP_MAX_SPEED)
     cut_prob = max(0.0, 1.0 - (t_opp / (t_ball + 1e-6)))
@@ -284,20 +495,78 @@ def evaluate_pass(world: World, team: Team, pass_from: Location, teammate: Robot
     reward = 2.2 * range_bonus + 2.8 * space_bonus - 1.5 * (1.0 - min(1.0, min_d / 0.6))
     return (max(0.0, reward), max(0.0, min(1.0, p)))
 
-def evaluate_dribble(world: World, team: Team, from_loc: Location, to_loc: Location) -> Tuple[float, float]:
-    progress = _attack_sign(team) * (to_loc.x - from_loc.x)
-    space = _nearest_opponent_dist(world, team, to_loc.x, to_loc.y)
+def _evaluate_pass_vec(loc_xy: Tuple[float, float], mate_xy: np.ndarray,
+                       mate_space: np.ndarray,
+                       opp_xy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Chấm điểm chuyền từ loc_xy tới CẢ M đồng đội một lượt (rewards[M], probs[M]).
+    Cùng công thức với _evaluate_pass_xy; `mate_space` (khoảng trống quanh mỗi
+    đồng đội) không phụ thuộc loc nên tính sẵn một lần mỗi lượt planner.
+    """
+    d = np.hypot(mate_xy[:, 0] - loc_xy[0], mate_xy[:, 1] - loc_xy[1])  # (M,)
+    L = np.maximum(1e-6, d)
+    if opp_xy.shape[0] == 0:
+        min_d = L
+        cover = np.zeros_like(d)
+    else:
+        d2mat = _seg_points_dist_sq_batch(loc_xy, mate_xy, opp_xy)      # (M,N) bình phương
+        min_d = np.sqrt(d2mat.min(axis=1))
+        cover = np.minimum(1.0, np.count_nonzero(d2mat <= 0.30 * 0.30, axis=1) * (0.6 / (L + 0.1)))
+
+    t_ball = d / max(1e-6, PASS_SPEED)
+    t_opp = min_d / max(1e-6, OPP_MAX_SPEED)
+    cut_prob = np.maximum(0.0, 1.0 - t_opp / (t_ball + 1e-6))
+
+    range_bonus = np.maximum(0.0, 1.0 - d / 10.0)
+    space_bonus = np.minimum(mate_space / 2.0, 1.0)
+    base_p = 0.5 * range_bonus + 0.5 * space_bonus
+    probs = np.clip(np.maximum(0.05, base_p * (1.0 - 0.9 * cover) * (1.0 - 0.8 * cut_prob)),
+                    0.0, 1.0)
+
+    rewards = np.maximum(0.0, 2.2 * range_bonus + 2.8 * space_bonus
+                         - 1.5 * (1.0 - np.minimum(1.0, min_d / 0.6)))
+    return (rewards, probs)
+
+def evaluate_dribble(world: World, team: Team, from_loc: Location, to_loc: Location,
+                     opp_xy: Optional[np.ndarray] = None,
+                     opp_grid: Optional[_OpponentGrid] = None,
+                     sign: Optional[int] = None) -> Tuple[float, float]:
+    if sign is None:
+        sign = _attack_sign(team)
+    progress = sign * (to_loc.x - from_loc.x)
+    space = _nearest_opponent_dist(world, team, to_loc.x, to_loc.y,
+                                   opp_xy=opp_xy, opp_grid=opp_grid)
     reward = 0.8 * progress + 1.2 * min(space, 2.0)
     p = max(0.1, min(1.0, space / 2.0))
     return (max(0.0, reward), p)
 
+def evaluate_deep_pass_vec(world: World, team: Team, pass_from: Location,
+                           receive_at: Location, goal_ys: np.ndarray,
+                           opp_xy: Optional[np.ndarray] = None,
+                           sign: Optional[int] = None,
+                           goal_x: Optional[float] = None) -> Tuple[float, np.ndarray]:
+    """Như evaluate_deep_pass nhưng quét cả lưới goal_y một lần (reward chung, probs[G])."""
+    if opp_xy is None:
+        opp_xy = _opponents_xy(world, team)
+    r_pass, p_pass = _evaluate_pass_xy(world, team, pass_from,
+                                       receive_at.x, receive_at.y, opp_xy=opp_xy)
+    r_shoot, p_shoot = evaluate_shoot_vec(world, team, receive_at, goal_ys,
+                                          respect_3m=False, robot_start=pass_from,
+                                          opp_xy=opp_xy, sign=sign, goal_x=goal_x)
+    reward = 0.5 * r_pass + 0.8 * r_shoot
+    probs = np.clip(p_pass * p_shoot, 0.0, 1.0)
+    return (max(0.0, reward), probs)
+
 def evaluate_deep_pass(world: World, team: Team, pass_from: Location,
-                       receive_at: Location, shoot_goal_y: float) -> Tuple[float, float]:
-    r_pass, p_pass = evaluate_pass(
-        world, team, pass_from,
-        type("T", (), {"x": receive_at.x, "y": receive_at.y, "active": True})()
-    )
-    r_shoot, p_shoot = evaluate_shoot(world, team, receive_at, shoot_goal_y, respect_3m=False, robot_start=pass_from)
+                       receive_at: Location, shoot_goal_y: float,
+                       opp_xy: Optional[np.ndarray] = None) -> Tuple[float, float]:
+    if opp_xy is None:
+        opp_xy = _opponents_xy(world, team)
+    r_pass, p_pass = _evaluate_pass_xy(world, team, pass_from,
+                                       receive_at.x, receive_at.y, opp_xy=opp_xy)
+    r_shoot, p_shoot = evaluate_shoot(world, team, receive_at, shoot_goal_y,
+                                      respect_3m=False, robot_start=pass_from,
+                                      opp_xy=opp_xy)
     reward = 0.5 * r_pass + 0.8 * r_shoot
     p = p_pass * p_shoot
     return (max(0.0, reward), max(0.0, min(1.0, p)))
@@ -312,20 +581,72 @@ def _angle(a: tuple[float, float], b: tuple[float, float]) -> float:
 
 def _angle_abs_diff(a: float, b: float) -> float:
     # |diff| với wrap về [-pi, pi]
-    d = (a - b + math.pi) % (2.0 * math.pi) - math.pi
-    return abs(d)
+    return abs(math.remainder(a - b, math.tau))
+
+
+
+def linear_in_interval(x, x0: float, x1: float, y0: float, y1: float):
+    """Nội suy tuyến tính kẹp trong [x0,x1] — nhận scalar hoặc ndarray."""
+    if isinstance(x, np.ndarray):
+        return y0 + (y1 - y0) * np.clip((x - x0) / (x1 - x0), 0.0, 1.0)
+    if x1 == x0:
+        return y0
+    t = (x - x0) / (x1 - x0)
+    return y0 + (y1 - y0) * (0.0 if t < 0.0 else (1.0 if t > 1.0 else t))
+
+def _interception_crit_np(sx: float, sy: float, cx: float, cy: float,
+                          opp_xy: np.ndarray,
+                          vitesse_deplacement: float, opponent_max_speed: float,
+                          inter_centre_distance: float, temps_reaction_opponent: float) -> float:
+    """Tỉ lệ min(t_opp/t_ball) trên tất cả đối thủ — đường NumPy (fallback khi không có numba)."""
+    d, t = _seg_points_distance((sx, sy), (cx, cy), opp_xy)
+    d_eff = np.maximum(0.0, d - inter_centre_distance)
+    t_opp = d_eff / max(1e-6, opponent_max_speed) \
+        + np.where(d_eff == 0.0, 0.0, temps_reaction_opponent)
+    L = math.hypot(cx - sx, cy - sy)
+    t_ball = (t * L) / max(1e-6, vitesse_deplacement)
+    return float((t_opp / np.maximum(1e-6, t_ball)).min())
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _interception_crit(sx, sy, cx, cy, opp_xy,
+                           vitesse_deplacement, opponent_max_speed,
+                           inter_centre_distance, temps_reaction_opponent):
+        # Kernel scalar cho numba: inline luôn _seg_point_distance
+        vx = cx - sx
+        vy = cy - sy
+        L2 = vx * vx + vy * vy
+        L = math.sqrt(L2)
+        crit = 1e18
+        for i in range(opp_xy.shape[0]):
+            dx = opp_xy[i, 0] - sx
+            dy = opp_xy[i, 1] - sy
+            t = (dx * vx + dy * vy) / L2
+            if t < 0.0:
+                t = 0.0
+            elif t > 1.0:
+                t = 1.0
+            ex = dx - t * vx
+            ey = dy - t * vy
+            d_eff = math.sqrt(ex * ex + ey * ey) - inter_centre_distance
+            if d_eff < 0.0:
+                d_eff = 0.0
+            tr = 0.0 if d_eff == 0.0 else temps_reaction_opponent
+            t_opp = d_eff / max(1e-6, opponent_max_speed) + tr
+            t_ball = (t * L) / max(1e-6, vitesse_deplacement)
+            c = t_opp / max(1e-6, t_ball)
+            if c < crit:
+                crit = c
+        return crit
+else:
+    _interception_crit = _interception_crit_np
 
 
-
-def linear_in_interval(x: float, x0: float, x1: float, y0: float, y1: float) -> float:
-    if x <= x0: return y0
-    if x >= x1: return y1
-    return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
-
 def evaluate_success_probability_absence_interception(
     start: Tuple[float, float],
     cible: Tuple[float, float],
-    interceptors: Iterable[Tuple[float, float]],
+    interceptors: "np.ndarray | Iterable[Tuple[float, float]]",
     vitesse_deplacement: float,         # tốc độ “bên mình”: bóng/robot tuỳ ngữ cảnh
     opponent_max_speed: float,          # tốc độ tối đa đối thủ
     inter_centre_distance: float = 0.35,
@@ -335,44 +656,82 @@ def evaluate_success_probability_absence_interception(
     Port từ C#: với mỗi đối thủ, lấy hình chiếu gần nhất lên đoạn start->cible.
     So sánh thời gian đối thủ tới điểm đó (cộng thời gian phản ứng) với thời gian
     của bóng/robot tới cùng điểm. Lấy tỉ lệ min, rồi nội suy [0.8..1.0] -> [0..1].
+    interceptors nhận thẳng ndarray (N,2) từ _opponents_xy — không dựng list mỗi lần.
     """
     sx, sy = start
     cx, cy = cible
-    vx, vy = cx - sx, cy - sy
-    L = math.hypot(vx, vy)
+    L = math.hypot(cx - sx, cy - sy)
     if L <= 1e-9:
         return 1.0
 
-    crits: List[float] = []
-    for (ix, iy) in interceptors:
-        # khoảng cách & tham số t tới đoạn
-        d, t = _seg_point_distance(start, cible, (ix, iy))  # đã có sẵn ở file của bạn
-        d_eff = max(0.0, d - inter_centre_distance)
-        tr = 0.0 if d_eff == 0.0 else temps_reaction_opponent
-        t_opp = d_eff / max(1e-6, opponent_max_speed) + tr
-
-        # quãng đường từ start tới điểm chiếu
-        d_start_proj = t * L
-        t_ball = d_start_proj / max(1e-6, vitesse_deplacement)
-
-        crits.append(t_opp / max(1e-6, t_ball))
-
-    if not crits:
+    opp = np.asarray(interceptors, dtype=float).reshape(-1, 2)
+    if opp.shape[0] == 0:
         return 1.0
-    crit_final = min(crits)
+
+    crit_final = _interception_crit(sx, sy, cible[0], cible[1], opp,
+                                    vitesse_deplacement, opponent_max_speed,
+                                    inter_centre_distance, temps_reaction_opponent)
     # C#: LinearInInterval(minRatio, 0.8, 1.0, 0, 1)
     return linear_in_interval(crit_final, 0.8, 1.0, 0.0, 1.0)
 
 
 
-def evaluate_goal_opening_angle(world, team, target_pos, goal_half_height: float = 1.2) -> float:
+def _interception_prob_vec(
+    start: Tuple[float, float],
+    cibles: np.ndarray,                 # (G,2) các điểm đích
+    opp_xy: np.ndarray,                 # (N,2) đối thủ
+    vitesse_deplacement: float,
+    opponent_max_speed: float,
+    inter_centre_distance: float = 0.35,
+    temps_reaction_opponent: float = 0.1
+) -> np.ndarray:
+    """
+    Bản vector hoá của evaluate_success_probability_absence_interception
+    trên cả mảng điểm đích: trả về probs (G,).
+    """
+    sx, sy = start
+    vx = cibles[:, 0] - sx                      # (G,)
+    vy = cibles[:, 1] - sy
+    L2 = vx * vx + vy * vy
+    L = np.sqrt(L2)
+
+    if opp_xy.shape[0] == 0:
+        return np.ones(cibles.shape[0])
+
+    dxi = opp_xy[:, 0] - sx                     # (N,)
+    dyi = opp_xy[:, 1] - sy
+
+    # t (N,G): hình chiếu từng đối thủ lên từng đoạn start->cible
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = (dxi[:, None] * vx[None, :] + dyi[:, None] * vy[None, :]) / L2[None, :]
+    t = np.clip(np.nan_to_num(t), 0.0, 1.0)
+
+    ex = dxi[:, None] - t * vx[None, :]
+    ey = dyi[:, None] - t * vy[None, :]
+    d = np.sqrt(ex * ex + ey * ey)              # (N,G)
+
+    d_eff = np.maximum(0.0, d - inter_centre_distance)
+    t_opp = d_eff / max(1e-6, opponent_max_speed) + np.where(d_eff == 0.0, 0.0, temps_reaction_opponent)
+    t_ball = (t * L[None, :]) / max(1e-6, vitesse_deplacement)
+    crit = (t_opp / np.maximum(1e-6, t_ball)).min(axis=0)   # (G,)
+
+    # LinearInInterval(crit, 0.8, 1.0, 0, 1) — dạng mảng
+    probs = linear_in_interval(crit, 0.8, 1.0, 0.0, 1.0)
+    # đoạn suy biến (L ~ 0): chắc chắn thành công
+    probs = np.where(L <= 1e-9, 1.0, probs)
+    return probs
+
+
+def evaluate_goal_opening_angle(world, team, target_pos, goal_half_height: float = 1.2,
+                                goal_x: Optional[float] = None) -> float:
     """
     Port từ C# Evaluate_GoalOpeningAngle:
     - Lấy 2 góc nhìn tới 2 mép khung thành: (goal_x, ±goal_half_height)
     - Độ mở = |diff góc| (đã wrap), rồi nội suy [0 .. pi/3] -> [0.2 .. 1.0]
     """
     # toạ độ cột dọc khung thành đối phương
-    goal_x = world.half_w if team.side == "left" else -world.half_w
+    if goal_x is None:
+        goal_x = team._side_sign * world.half_w
     tx, ty = target_pos.x, target_pos.y
 
     hi = _angle((tx, ty), (goal_x, +goal_half_height))
@@ -397,9 +756,21 @@ def build_move_with_ball_actions(
         return []
     goal_x = _goal_x_for(team, world)
     sign = _attack_sign(team)
+    opp_xy = np.ascontiguousarray(_opponents_xy(world, team))   # cache 1 lần cho cả lượt planner
+    opp_grid = _OpponentGrid(opp_xy)
+    goal_ys = _GOAL_Y_GRID
+
+    # đồng đội nhận chuyền + khoảng trống quanh họ — bất biến trong lượt planner
+    mates = [m for m in team.robots.values() if m.active and m.robot_id != robot_id]
+    if mates:
+        mate_xy = np.array([[m.x, m.y] for m in mates])
+        mate_space = np.array([opp_grid.nearest_dist(m.x, m.y) for m in mates])
+    else:
+        mate_xy = np.empty((0, 2))
+        mate_space = np.empty(0)
 
     def _key(sub: int) -> int:
-        return robot_id * 10000 + PlayingAction.MovingWithBall * 100 + sub
+        return robot_id * 10000 + _MWB * 100 + sub
 
     default_types = [PlayingAction.TryToShoot, PlayingAction.TryToPass,
                      PlayingAction.TryToDeepPass, PlayingAction.TryToDribble]
@@ -409,81 +780,86 @@ def build_move_with_ball_actions(
     results: List[ActionQValue] = []
 
     for inst in instant_types:
-        ref = imagined_optimal_long_actions.get(_key(inst))
+        inst_i = int(inst)
+        ref = imagined_optimal_long_actions.get(_key(inst_i))
         rosace_loc = ref.location_action_envisagee if (ref and ref.location_action_envisagee) else None
 
-        possible: List[Tuple[Location, bool]] = []
-        if inst == PlayingAction.TryToShoot:
+        if inst_i == _SHOOT:
             base_pos = Location(sign * world.field_w / 4.0, 0.0, 0.0)
-            aa = determine_action_possible_locations(base_pos, rosace_loc, radius=10.0, nb_pts_test_base=4, nb_pts_test_rosace=4)
-            bb = determine_action_possible_locations(Location(r.x, r.y, r.theta), None, radius=2.0, nb_pts_test_base=3, nb_pts_test_rosace=0)
-            possible = aa + bb
-        elif inst == PlayingAction.TryToDribble:
-            possible = determine_action_possible_locations(Location(r.x, r.y, r.theta), rosace_loc, radius=10.0, nb_pts_test_base=4, nb_pts_test_rosace=5)
-        elif inst == PlayingAction.TryToPass:
-            possible = determine_action_possible_locations(Location(r.x, r.y, r.theta), rosace_loc, radius=radius_extended)
-        elif inst == PlayingAction.TryToDeepPass:
+            aa, aa_cur = determine_action_possible_locations(base_pos, rosace_loc, radius=10.0, nb_pts_test_base=4, nb_pts_test_rosace=4)
+            bb, bb_cur = determine_action_possible_locations(Location(r.x, r.y, r.theta), None, radius=2.0, nb_pts_test_base=3, nb_pts_test_rosace=0)
+            possible = np.concatenate([aa, bb], axis=0)
+            current_mask = np.concatenate([aa_cur, bb_cur])
+        elif inst_i == _DRIBBLE:
+            possible, current_mask = determine_action_possible_locations(Location(r.x, r.y, r.theta), rosace_loc, radius=10.0, nb_pts_test_base=4, nb_pts_test_rosace=5)
+        elif inst_i == _PASS:
+            possible, current_mask = determine_action_possible_locations(Location(r.x, r.y, r.theta), rosace_loc, radius=radius_extended)
+        elif inst_i == _DEEP_PASS:
             target_ref = ref.location_action_target_envisagee if (ref and ref.location_action_target_envisagee) else None
-            possible = determine_action_possible_locations(Location(r.x, r.y, r.theta), target_ref, radius=radius_extended)
-
-        for loc, is_current in possible:
-            if abs(loc.x) > world.half_w or abs(loc.y) > world.half_h:
-                continue
-
-            if inst == PlayingAction.TryToShoot:
-                best_reward, best_prob, best_goal_y = 0.0, 0.0, 0.0
-                for y_goal in [i * 0.25 for i in range(-4, 5)]:
-                    rew, prob = evaluate_shoot(world, team, loc, y_goal, respect_3m=True,
-                                               robot_start=Location(r.x, r.y, r.theta))
-                    if rew > best_reward:
-                        best_reward, best_prob, best_goal_y = rew, prob, y_goal
+            possible, current_mask = determine_action_possible_locations(Location(r.x, r.y, r.theta), target_ref, radius=radius_extended)
+        else:
+            continue
+
+        # lọc ngoài sân (và nửa sân phòng ngự với sút) trước khi chấm điểm
+        keep = (np.abs(possible[:, 0]) <= world.half_w) & (np.abs(possible[:, 1]) <= world.half_h)
+        if inst_i == _SHOOT:
+            keep &= possible[:, 0] * sign > 0.0
+        if not keep.all():
+            possible = possible[keep]
+            current_mask = current_mask[keep]
+
+        for row, is_current in zip(possible, current_mask):
+            loc = Location(float(row[0]), float(row[1]), float(row[2]))
+            is_current = bool(is_current)
+
+            if inst_i == _SHOOT:
+                best_reward, probs = evaluate_shoot_vec(world, team, loc, goal_ys,
+                                                        respect_3m=True,
+                                                        robot_start=Location(r.x, r.y, r.theta),
+                                                        opp_xy=opp_xy, sign=sign, goal_x=goal_x)
+                gi = int(np.argmax(probs))
+                best_prob, best_goal_y = float(probs[gi]), float(goal_ys[gi])
                 if best_reward > 0.0:
-                    a = ActionQValue(r.robot_id, PlayingAction.MovingWithBall, action_subtype=PlayingAction.TryToShoot)
-                    a.action_reward = best_reward
-                    a.success_probability = best_prob
+                    a = _new_aqv(r.robot_id, PlayingAction.TryToShoot, best_reward, best_prob)
                     a.set_envisagee(Location(loc.x, loc.y, math.atan2(best_goal_y - loc.y, goal_x - loc.x)))
                     a.is_current_action_loc = is_current
                     results.append(a)
 
-            elif inst == PlayingAction.TryToPass:
-                for mate in team.robots.values():
-                    if mate.robot_id == r.robot_id or not mate.active:
-                        continue
-                    rew, prob = evaluate_pass(world, team, loc, mate)
+            elif inst_i == _PASS:
+                if not mates:
+                    continue
+                rews, probs = _evaluate_pass_vec((loc.x, loc.y), mate_xy, mate_space, opp_xy)
+                for j, mate in enumerate(mates):
+                    rew = float(rews[j])
                     if rew <= 0.0:
                         continue
-                    a = ActionQValue(r.robot_id, PlayingAction.MovingWithBall, action_subtype=PlayingAction.TryToPass)
-                    a.action_reward = rew
-                    a.success_probability = prob
+                    a = _new_aqv(r.robot_id, PlayingAction.TryToPass, rew, float(probs[j]))
                     ang = math.atan2(mate.y - loc.y, mate.x - loc.x)
                     a.set_envisagee(Location(loc.x, loc.y, ang))
                     a.set_target(Location(mate.x, mate.y, 0.0))
                     a.is_current_action_loc = is_current
                     results.append(a)
 
-            elif inst == PlayingAction.TryToDeepPass:
-                best_reward, best_prob, best_goal_y = 0.0, 0.0, 0.0
-                for y_goal in [i * 0.25 for i in range(-4, 5)]:
-                    rew, prob = evaluate_deep_pass(world, team, Location(r.x, r.y, r.theta), loc, y_goal)
-                    if rew > best_reward:
-                        best_reward, best_prob, best_goal_y = rew, prob, y_goal
+            elif inst_i == _DEEP_PASS:
+                best_reward, probs = evaluate_deep_pass_vec(world, team, Location(r.x, r.y, r.theta),
+                                                            loc, goal_ys, opp_xy=opp_xy,
+                                                            sign=sign, goal_x=goal_x)
+                gi = int(np.argmax(probs))
+                best_prob = float(probs[gi])
                 if best_reward > 0.0:
-                    a = ActionQValue(r.robot_id, PlayingAction.MovingWithBall, action_subtype=PlayingAction.TryToDeepPass)
-                    a.action_reward = best_reward
-                    a.success_probability = best_prob
+                    a = _new_aqv(r.robot_id, PlayingAction.TryToDeepPass, best_reward, best_prob)
                     ang = math.atan2(loc.y - r.y, loc.x - r.x)
                     a.set_envisagee(Location(r.x, r.y, ang))
                     a.set_target(Location(loc.x, loc.y, 0.0))
                     a.is_current_action_loc = is_current
                     results.append(a)
 
-            elif inst == PlayingAction.TryToDribble:
-                rew, prob = evaluate_dribble(world, team, Location(r.x, r.y, r.theta), loc)
+            elif inst_i == _DRIBBLE:
+                rew, prob = evaluate_dribble(world, team, Location(r.x, r.y, r.theta), loc,
+                                             opp_xy=opp_xy, opp_grid=opp_grid, sign=sign)
                 if rew <= 0.0:
                     continue
-                a = ActionQValue(r.robot_id, PlayingAction.MovingWithBall, action_subtype=PlayingAction.TryToDribble)
-                a.action_reward = rew
-                a.success_probability = prob
+                a = _new_aqv(r.robot_id, PlayingAction.TryToDribble, rew, prob)
                 ang = math.atan2(loc.y - r.y, loc.x - r.x)
                 a.set_envisagee(Location(loc.x, loc.y, ang))
                 a.is_current_action_loc = is_current
@@ -496,4 +872,12 @@ def build_move_with_ball_actions(
 def choose_best_action(actions: List[ActionQValue]) -> Optional[ActionQValue]:
     if not actions:
         return None
-    return max(actions, key=lambda a: a.action_reward * max(1e-3, a.success_probability))
+    # single-pass, không lambda per-item
+    best: Optional[ActionQValue] = None
+    best_q = -math.inf
+    for a in actions:
+        p = a.success_probability
+        q = a.action_reward * (p if p > 1e-3 else 1e-3)
+        if q > best_q:
+            best, best_q = a, q
+    return best
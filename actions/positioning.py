@@ -1,34 +1,83 @@
 # actions/positioning.py
 from __future__ import annotations
 import math
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:     # numba là tuỳ chọn — không có thì chạy Python thuần
+    njit = None
+
 from .base import Action, Status
+from config.constants import GOAL_WIDTH
 from models.world import World
 from models.team import Team
 from models.robot import Robot
 
+_HALF_GOAL = GOAL_WIDTH * 0.5   # nửa miệng gôn — dùng trong hot path GK
+
 def _sign(team: Team) -> int:
-    return +1 if team.side=="left" else -1
+    return team._side_sign
 
 def _clamp(x, lo, hi): return max(lo, min(hi, x))
 
 def _wrap(a: float) -> float:
     return (a + math.pi) % (2.0 * math.pi) - math.pi
 
+# --- lõi hình học thuần số (njit khi có numba, biên dịch lúc import) ---
+# world.state được mã hoá int 1 lần mỗi lời gọi để không đưa chuỗi vào kernel
+_ST_OTHER, _ST_PLAYING, _ST_KICKOFF = 0, 1, 2
+_STATE_CODES = {"playing": _ST_PLAYING, "kickoff_left": _ST_KICKOFF, "kickoff_right": _ST_KICKOFF}
+
+def _distort_core(side_sign: int, x: float, y: float,
+                  half_w: float, half_h: float, distort_k: float) -> tuple[float, float]:
+    # hệ số nén theo khoảng cách tới biên đối phương
+    t = (x * side_sign + half_w) / (2.0 * half_w)    # ~[0..1]
+    k = 1.0 - distort_k * t                          # 1 → (1-distort_k)
+    max_y = k * (half_h - 0.5)
+    # clamp không rẽ nhánh (predicated) — thân thiện fastmath/njit
+    lo_x, hi_x = -half_w + 0.5, half_w - 0.5
+    xx = x - (x - hi_x) * (x > hi_x) - (x - lo_x) * (x < lo_x)
+    yy = y - (y - max_y) * (y > max_y) - (y + max_y) * (y < -max_y)
+    return xx, yy
+
+def _kickoff_core(state_code: int, side_sign: int, x: float, y: float) -> tuple[float, float]:
+    # giữ về nửa sân mình nếu chưa 'playing'
+    if state_code != _ST_PLAYING:
+        x = min(x, 0.0) if side_sign == 1 else max(x, 0.0)
+    # vòng tròn giữa sân bán kính 1.0
+    if state_code == _ST_KICKOFF and x * x + y * y < 1.0:
+        ang = math.atan2(y, x)
+        x = math.cos(ang)
+        y = math.sin(ang)
+    return x, y
+
+def _cone_capture(dx: float, dy: float, cos_t: float, sin_t: float,
+                  capture_dist: float, cos_cone: float) -> bool:
+    # so sánh tích vô hướng với cos(cone)*d — khỏi atan2 + wrap
+    d2 = dx * dx + dy * dy
+    if d2 > capture_dist * capture_dist:
+        return False
+    return dx * cos_t + dy * sin_t >= cos_cone * math.sqrt(d2)
+
+if njit is not None:
+    _distort_core = njit("UniTuple(f8, 2)(i8, f8, f8, f8, f8, f8)",
+                         cache=True, fastmath=True)(_distort_core)
+    _kickoff_core = njit("UniTuple(f8, 2)(i8, i8, f8, f8)",
+                         cache=True, fastmath=True)(_kickoff_core)
+    _cone_capture = njit("b1(f8, f8, f8, f8, f8, f8)",
+                         cache=True, fastmath=True)(_cone_capture)
+
 def distorted_theoretical_xy(world: World, team: Team, x: float, y: float,
                              distort_k: float = 0.35) -> tuple[float, float]:
     """
     'Distort' theo chiều tấn công: càng gần cầu môn đối phương, giới hạn
     biên mạnh tay hơn để tránh dồn ra biên/góc.
     """
-    s = _sign(team)
-    # hệ số nén theo khoảng cách tới biên đối phương
-    t = (x * s + world.half_w) / (2*world.half_w)    # ~[0..1]
-    k = 1.0 - distort_k * t                          # 1 → (1-distort_k)
-    max_y = k * (world.half_h - 0.5)
-    return (_clamp(x, -world.half_w+0.5, world.half_w-0.5),
-            _clamp(y, -max_y, max_y))
+    return _distort_core(_sign(team), x, y, world.half_w, world.half_h, distort_k)
 
 def kickoff_restricted(world: World, team: Team, x: float, y: float) -> tuple[float, float]:
     """
@@ -36,27 +85,104 @@ def kickoff_restricted(world: World, team: Team, x: float, y: float) -> tuple[fl
      - Không đứng trong vòng tròn giữa sân bán kính 1.0 khi *đối thủ* giao bóng.
      - Giữ trong phần sân của mình trước khi 'playing'.
     """
-    st = world.state
-    x2, y2 = x, y
+    return _kickoff_core(_STATE_CODES.get(world.state, _ST_OTHER), _sign(team), x, y)
 
-    # giữ về nửa sân mình nếu chưa 'playing'
-    if st != "playing":
-        s = _sign(team)
-        if s == +1:  # left tấn công +x → nửa trái là x <= 0
-            x2 = min(x2, 0.0)
-        else:        # right → nửa phải
-            x2 = max(x2, 0.0)
+# ---------------- Batch SoA (vector hoá cho cả đội hình) ----------------
+# Mã vai trò cho đường batch — planner gom vai trò rồi tính target 1 lượt
+ROLE_PLAYBALL = 0
+ROLE_ASSIST = 1
+ROLE_DEFENSE = 2
+ROLE_GK = 3
 
-    # vòng tròn giữa sân
+def distorted_theoretical_xy_vec(world: World, team: Team,
+                                 tx: np.ndarray, ty: np.ndarray,
+                                 distort_k: float = 0.35,
+                                 sign: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Bản vector của distorted_theoretical_xy trên mảng (tx, ty)."""
+    s = _sign(team) if sign is None else sign
+    t = (tx * s + world.half_w) / (2 * world.half_w)
+    k = 1.0 - distort_k * t
+    max_y = k * (world.half_h - 0.5)
+    return (np.clip(tx, -world.half_w + 0.5, world.half_w - 0.5),
+            np.clip(ty, -max_y, max_y))
+
+def kickoff_restricted_vec(world: World, team: Team,
+                           tx: np.ndarray, ty: np.ndarray,
+                           sign: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Bản vector của kickoff_restricted trên mảng (tx, ty)."""
+    st = world.state
+    if st != "playing":
+        s = _sign(team) if sign is None else sign
+        tx = np.minimum(tx, 0.0) if s == +1 else np.maximum(tx, 0.0)
     if st in ("kickoff_left", "kickoff_right"):
-        cx, cy, r = 0.0, 0.0, 1.0
-        if (x2-cx)**2 + (y2-cy)**2 < r*r:
-            # đẩy ra biên vòng tròn theo hướng giữ nguyên góc
-            ang = math.atan2(y2-cy, x2-cx)
-            x2 = cx + r * math.cos(ang)
-            y2 = cy + r * math.sin(ang)
+        inside = tx * tx + ty * ty < 1.0
+        if inside.any():
+            ang = np.arctan2(ty, tx)
+            tx = np.where(inside, np.cos(ang), tx)
+            ty = np.where(inside, np.sin(ang), ty)
+    return tx, ty
+
+def batch_position_targets(world: World, team: Team,
+                           roles: np.ndarray, robot_ids: np.ndarray,
+                           depths: np.ndarray,
+                           *, offset_back: float = 1.2, offset_side: float = 0.8,
+                           radial: float = 2.5, angle_deg: float = 35.0,
+                           line_depth: float = 0.4,
+                           sign: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tính target (tx, ty) cho CẢ đội hình không cầm bóng trong vài phép NumPy,
+    thay vì gọi từng Positioning*.step. Cùng công thức với các Action tương ứng.
+    """
+    bx, by = world.ball.x, world.ball.y
+    s = _sign(team) if sign is None else sign
+    goal_x = world.half_w if s > 0 else -world.half_w
+    own_goal_x = -goal_x
+    n = roles.shape[0]
+    tx = np.empty(n)
+    ty = np.empty(n)
+
+    m = roles == ROLE_PLAYBALL
+    if m.any():
+        tx[m] = bx - s * offset_back
+        ty[m] = by + (offset_side if by <= 0 else -offset_side)
+
+    m = roles == ROLE_ASSIST
+    if m.any():
+        ang0 = math.atan2(0.0 - by, goal_x - bx)
+        ang = ang0 + math.radians(angle_deg) * np.where(robot_ids[m] % 2 == 0, 1.0, -1.0)
+        tx[m] = bx + radial * np.cos(ang)
+        ty[m] = by + radial * np.sin(ang)
+
+    m = roles == ROLE_DEFENSE
+    if m.any():
+        angd = math.atan2(by - 0.0, bx - own_goal_x)   # từ gôn mình về bóng
+        tx[m] = bx - depths[m] * math.cos(angd)
+        ty[m] = by - depths[m] * math.sin(angd)
 
-    return x2, y2
+    tx, ty = distorted_theoretical_xy_vec(world, team, tx, ty, sign=s)
+    tx, ty = kickoff_restricted_vec(world, team, tx, ty, sign=s)
+
+    # GK đặt sau cùng: bám trục gôn, không qua distort/kickoff (như GoalKeeping.step)
+    m = roles == ROLE_GK
+    if m.any():
+        tx[m] = own_goal_x + s * line_depth
+        ty[m] = _clamp(by, -_HALF_GOAL, _HALF_GOAL)
+
+    return tx, ty
+
+# Đặc biệt hoá theo side: side của planner cố định cả trận nên gấp sẵn dấu
+# vào closure (partial evaluation) — 2 planner cùng side dùng chung 1 bản.
+_BATCH_BY_SIGN: dict[int, object] = {}
+
+def make_positioning_for_side(side_sign: int):
+    """Trả về bản batch_position_targets với `sign` đã gấp cứng cho 1 side."""
+    fn = _BATCH_BY_SIGN.get(side_sign)
+    if fn is None:
+        def fn(world, team, roles, robot_ids, depths, **kw):
+            return batch_position_targets(world, team, roles, robot_ids, depths,
+                                          sign=side_sign, **kw)
+        _BATCH_BY_SIGN[side_sign] = fn
+    return fn
 
 # ---------------- Actions ----------------
 
@@ -155,10 +281,9 @@ class GoalKeeping(Action):
     def __post_init__(self): self.name = "GoalKeeping"
 
     def step(self, world: World, team: Team, robot: Robot, dt: float) -> Status:
-        from config.constants import GOAL_WIDTH
         s = _sign(team)
         xg = -world.half_w + self.line_depth if s>0 else world.half_w - self.line_depth
-        yg = _clamp(world.ball.y, -GOAL_WIDTH*0.5, GOAL_WIDTH*0.5)
+        yg = _clamp(world.ball.y, -_HALF_GOAL, _HALF_GOAL)
         robot.command_face_point(world.ball.x, world.ball.y)
         robot.command_move_towards(xg, yg, speed=self.speed)
         if abs(robot.y - yg) <= self.tol_y and abs(robot.x - xg) <= 0.1:
@@ -166,6 +291,35 @@ class GoalKeeping(Action):
         return Status.RUNNING
 
 
+def _make_seek_step(approach_speed: float, capture_dist: float,
+                    cos_cone: float, glue_eps: float):
+    """Gấp config bất biến của SeekBall vào closure — vòng trong không tra slot."""
+    cone_capture = _cone_capture
+    cos_f, sin_f = math.cos, math.sin
+
+    def _step(world: World, robot: Robot) -> Status:
+        ball = world.ball
+        bx, by = ball.x, ball.y
+
+        # điều khiển: quay mặt & tiến tới bóng
+        robot.command_face_point(bx, by)
+        robot.command_move_towards(bx, by, speed=approach_speed)
+
+        # điều kiện bắt bóng — cos/sin hướng robot tính 1 lần, dùng lại khi dính bóng
+        dx, dy = bx - robot.x, by - robot.y
+        c, s = cos_f(robot.theta), sin_f(robot.theta)
+        if cone_capture(dx, dy, c, s, capture_dist, cos_cone):
+            robot.has_ball = True
+            # dính bóng phía trước mũi robot
+            dfront = robot.half_side + ball.radius - glue_eps
+            ball.set_pos(robot.x + dfront * c, robot.y + dfront * s)
+            ball.set_vel(robot.vx, robot.vy)
+            return Status.SUCCESS
+        return Status.RUNNING
+
+    return _step
+
+
 @dataclass(slots=True)
 class SeekBall(Action):
     """
@@ -176,28 +330,14 @@ class SeekBall(Action):
     capture_dist: float = 0.35
     front_cone_deg: float = 45.0
     glue_epsilon: float = 0.01
+    _step_impl: object = field(default=None, init=False, repr=False)
 
     def __post_init__(self):
         self.name = "SeekBall"
+        # config bất biến sau khi tạo → pre-bind 1 lần lúc dựng
+        self._step_impl = _make_seek_step(self.approach_speed, self.capture_dist,
+                                          math.cos(math.radians(self.front_cone_deg)),
+                                          self.glue_epsilon)
 
     def step(self, world: World, team: Team, robot: Robot, dt: float) -> Status:
-        bx, by = world.ball.x, world.ball.y
-
-        # điều khiển: quay mặt & tiến tới bóng
-        robot.command_face_point(bx, by)
-        robot.command_move_towards(bx, by, speed=self.approach_speed)
-
-        # điều kiện bắt bóng
-        dx, dy = bx - robot.x, by - robot.y
-        d = math.hypot(dx, dy)
-        ang_to_ball = math.atan2(dy, dx)
-        if d <= self.capture_dist and abs(_wrap(ang_to_ball - robot.theta)) <= math.radians(self.front_cone_deg):
-            robot.has_ball = True
-            # dính bóng phía trước mũi robot
-            dfront = robot.half_side + world.ball.radius - self.glue_epsilon
-            c, s = math.cos(robot.theta), math.sin(robot.theta)
-            world.ball.set_pos(robot.x + dfront * c, robot.y + dfront * s)
-            world.ball.set_vel(robot.vx, robot.vy)
-            return Status.SUCCESS
-
-        return Status.RUNNING
+        return self._step_impl(world, robot)
@@ -2,8 +2,11 @@
 from __future__ import annotations
 
 import math
+import sys
 from typing import Dict, Optional, Tuple, List
 
+import numpy as np
+
 from models.world import World
 from models.team import Team
 from models.robot import Robot
@@ -15,6 +18,7 @@ from actions.planning import (
     Location,
     build_move_with_ball_actions,
     choose_best_action,
+    recycle_actions,
     can_execute_at,
     exec_shoot,
     exec_pass,
@@ -23,14 +27,28 @@ from actions.planning import (
 # Primitive actions for non-holder roles
 #from actions.ball import SeekBall
 from actions.positioning import (
-    PositioningPlayingBall,
-    PositioningAssist,
-    PositioningDefense,
-    GoalKeeping,
+    ROLE_PLAYBALL,
+    ROLE_ASSIST,
+    ROLE_DEFENSE,
+    ROLE_GK,
+    make_positioning_for_side,
     SeekBall,
 )
 
 
+# Nhãn dbg intern sẵn — gán theo identity, không cấp phát str mỗi tick
+_DBG_GK = sys.intern("GoalKeeping")
+_DBG_PLAYBALL = sys.intern("PositioningPlayingBall")
+_DBG_ASSIST = sys.intern("PositioningAssist")
+_DBG_DEFEND = sys.intern("PositioningDefense")
+_DBG_SEEK = sys.intern("SeekBall")
+_DBG_FALLBACK_DRIBBLE = sys.intern("FallbackDribble")
+_DBG_FALLBACK_MOVE = sys.intern("FallbackMove")
+
+# Tên action theo mã int — tra dict thay vì dựng PlayingAction(...) + try/except mỗi tick
+_SUBTYPE_NAMES = {int(a): sys.intern(a.name) for a in PlayingAction}
+
+
 class StrategyPlannerFull:
     """
     Chiến thuật đầy đủ cho 1 team:
@@ -48,6 +66,10 @@ class StrategyPlannerFull:
         allowed_per_robot: Optional[Dict[int, set[int]]] = None,  # PlayingAction.* instant
     ):
         self.team_side = team_side
+        # hằng theo đội — tính 1 lần, hot-path chỉ nhân dấu
+        self._side_sign = +1 if team_side == "left" else -1
+        # bản batch positioning đã gấp sẵn dấu side vào closure
+        self._batch_targets = make_positioning_for_side(self._side_sign)
         self.primary_attacker_id = primary_attacker_id
         self.allowed_per_robot = allowed_per_robot or {}
 
@@ -55,75 +77,99 @@ class StrategyPlannerFull:
         # key = rid*10000 + PlayingAction.MovingWithBall*100 + subAction
         self.imagined_optimal: Dict[int, ActionQValue] = {}
 
-        # Các instance action dùng lại (không cấp phát mỗi frame)
-        self._seek_cache: Dict[int, SeekBall] = {}
-        self._pos_play_cache: Dict[int, PositioningPlayingBall] = {}
-        self._assist_cache: Dict[int, PositioningAssist] = {}
-        self._def_cache: Dict[int, PositioningDefense] = {}
-        self._gk_cache: Dict[int, GoalKeeping] = {}
+        # Instance SeekBall dùng lại — bảng list index theo robot_id
+        # (rid nhỏ & đặc nên index list rẻ hơn hash dict mỗi tick)
+        self._seek_table: List[Optional[SeekBall]] = []
 
     # ------------------------ public ------------------------
 
     def decide(self, world: World) -> None:
         team = world.team_left if self.team_side == "left" else world.team_right
-        if len(team.robots) == 0:
+        n = len(team.robots)
+        if n == 0:
             return
 
-        # 1) chọn GK (robot gần khung thành nhà nhất)
-        gk_id = self._select_goalkeeper(world, team)
-
-        # 2) xác định holder (đội mình có giữ bóng không?)
-        holder_id = self._find_holder_id(team)
+        # Snapshot SoA 1 lần — GK, holder và chaser rút ra từ cùng 1 lượt quét
+        # thay vì 3 vòng duyệt dict riêng lẻ.
+        rids = list(team.robots.keys())
+        robots = list(team.robots.values())
+        rx = np.fromiter((r.x for r in robots), dtype=np.float64, count=n)
+        ry = np.fromiter((r.y for r in robots), dtype=np.float64, count=n)
+        active = np.fromiter((r.active for r in robots), dtype=bool, count=n)
+        has_ball = np.fromiter((r.has_ball for r in robots), dtype=bool, count=n)
+
+        # 1) GK = robot active gần khung thành nhà nhất
+        own_goal_x = -self._side_sign * world.half_w
+        gk_idx = int(np.argmin(np.where(active, np.abs(rx - own_goal_x), np.inf)))
+        gk_id = rids[gk_idx]
+
+        # 2) holder (đội mình có giữ bóng không?)
+        holding = active & has_ball
+        holder_id = rids[int(np.argmax(holding))] if holding.any() else None
         opp_holder = self._find_holder_id(world.team_right if team is world.team_left else world.team_left)
 
+        # snapshot (rid, robot) dùng chung cho cả 2 mode — không duyệt lại dict
+        pairs = list(zip(rids, robots))
+
         if holder_id is not None:
             # --- ATTACK MODE: mình đang giữ bóng ---
-            self._attack_mode(world, team, gk_id, holder_id)
+            self._attack_mode(world, team, gk_id, holder_id, pairs)
         else:
-            # --- DEFENSE MODE: không giữ bóng (đối thủ có hoặc bóng tự do) ---
-            self._defense_mode(world, team, gk_id, opp_holder)
+            # --- DEFENSE MODE: chaser = active gần bóng nhất, trừ GK ---
+            d2_ball = (rx - world.ball.x) ** 2 + (ry - world.ball.y) ** 2
+            cand = active.copy()
+            cand[gk_idx] = False
+            chaser_id = rids[int(np.argmin(np.where(cand, d2_ball, np.inf)))] if cand.any() else None
+            self._defense_mode(world, team, gk_id, opp_holder, chaser_id, pairs)
 
     # ------------------------ modes ------------------------
 
-    def _attack_mode(self, world: World, team: Team, gk_id: int, holder_id: int) -> None:
+    def _attack_mode(self, world: World, team: Team, gk_id: int, holder_id: int,
+                     pairs: List[Tuple[int, Robot]]) -> None:
         # 1) Holder → planner chọn instant action & thi hành thật
         holder = team.get(holder_id)
         if holder and holder.active:
             self._act_with_ball(world, team, holder)
 
-        # 2) Vai trò còn lại
-        others: List[int] = [rid for rid in team.robots.keys() if rid != holder_id]
-        # đảm bảo GK luôn GK
-        if gk_id in others:
-            self._goalkeep(world, team, gk_id)
-            others.remove(gk_id)
+        # 2) Vai trò còn lại — gom lại rồi tính target 1 lượt (SoA)
+        assigns: List[Tuple[Robot, int, float, str]] = []
+        others: List[Robot] = []
+        for rid, r in pairs:
+            if rid == holder_id:
+                continue
+            if rid == gk_id:
+                # đảm bảo GK luôn GK
+                self._push_role(assigns, r, ROLE_GK, 0.0, _DBG_GK)
+            else:
+                others.append(r)
 
         # Ưu tiên 1 người PositioningPlayingBall (làm tuyến nhận),
         # 1-2 người Assist (mở tam giác), phần còn lại Defense
-        if others:
-            rid_pb = others.pop(0)
-            self._pos_playing_ball(world, team, rid_pb)
-        for _ in range(min(2, len(others))):
-            rid_as = others.pop(0)
-            self._assist(world, team, rid_as)
-        for rid_df in others:
-            self._defend(world, team, rid_df)
-
-    def _defense_mode(self, world: World, team: Team, gk_id: int, opp_holder_id: Optional[int]) -> None:
-        # 1) GK luôn GK
-        self._goalkeep(world, team, gk_id)
-
-        # 2) Chọn chaser (gần bóng nhất, tránh GK)
-        chaser_id = self._nearest_to_ball(world, team, exclude={gk_id})
+        for i, r in enumerate(others):
+            if i == 0:
+                self._push_role(assigns, r, ROLE_PLAYBALL, 0.0, _DBG_PLAYBALL)
+            elif i <= 2:
+                self._push_role(assigns, r, ROLE_ASSIST, 0.0, _DBG_ASSIST)
+            else:
+                self._push_role(assigns, r, ROLE_DEFENSE, 2.5, _DBG_DEFEND)
+        self._dispatch_positioning(world, team, assigns)
+
+    def _defense_mode(self, world: World, team: Team, gk_id: int, opp_holder_id: Optional[int],
+                      chaser_id: Optional[int], pairs: List[Tuple[int, Robot]]) -> None:
+        assigns: List[Tuple[Robot, int, float, str]] = []
+
+        # chaser (đã chọn sẵn trong decide)
         if chaser_id is not None:
             self._seek_ball(world, team, chaser_id)
 
-        # 3) Phần còn lại đứng phòng ngự (độ sâu tăng nếu đối thủ giữ bóng)
-        for rid, r in team.robots.items():
-            if not r.active or rid in (gk_id, chaser_id):
-                continue
-            depth = 2.5 if opp_holder_id is not None else 2.0
-            self._defend(world, team, rid, depth=depth)
+        # GK luôn GK; phần còn lại phòng ngự (độ sâu tăng nếu đối thủ giữ bóng)
+        depth = 2.5 if opp_holder_id is not None else 2.0
+        for rid, r in pairs:
+            if rid == gk_id:
+                self._push_role(assigns, r, ROLE_GK, 0.0, _DBG_GK)
+            elif rid != chaser_id:
+                self._push_role(assigns, r, ROLE_DEFENSE, depth, _DBG_DEFEND)
+        self._dispatch_positioning(world, team, assigns)
 
     # ------------------------ holder planner ------------------------
 
@@ -134,10 +180,12 @@ class StrategyPlannerFull:
             imagined_optimal_long_actions=self.imagined_optimal,
         )
         best = choose_best_action(actions)
+        # các ứng viên không được chọn quay về pool cho tick sau
+        recycle_actions(actions, keep=best)
         if not best:
             # fallback nhỏ: dribble thẳng về phía cầu môn đối phương
-            goal_x = world.half_w if team.side == "left" else -world.half_w
-            r.dbg_action = "FallbackDribble"               # <-- thêm
+            goal_x = self._side_sign * world.half_w
+            r.dbg_action = _DBG_FALLBACK_DRIBBLE
             r.command_face_point(goal_x, 0.0)
             r.command_move_towards(goal_x, 0.0, speed=1.5)
             return
@@ -149,14 +197,14 @@ class StrategyPlannerFull:
         env = best.location_action_envisagee
         tgt = best.location_action_target_envisagee
 
-        # đặt tên action để UI hiển thị
-        try:
-            r.dbg_action = PlayingAction(best.action_subtype or best.imagined_robot_action).name
-        except Exception:
-            r.dbg_action = "MovingWithBall"
+        # đặt tên action để UI hiển thị (memo theo mã int)
+        dbg = _SUBTYPE_NAMES.get(best.action_subtype or best.imagined_robot_action,
+                                 _SUBTYPE_NAMES[int(PlayingAction.MovingWithBall)])
+        if r.dbg_action is not dbg:
+            r.dbg_action = dbg
 
         if best.action_subtype == PlayingAction.TryToShoot:
-            goal_x = world.half_w if team.side == "left" else -world.half_w
+            goal_x = self._side_sign * world.half_w
             r.command_move_towards(env.x, env.y, speed=1.6)
             r.command_face_point(goal_x, 0.0)
             if r.has_ball and can_execute_at(r, env):
@@ -179,8 +227,8 @@ class StrategyPlannerFull:
             r.command_move_towards(env.x, env.y, speed=1.6)
 
         else:
-            goal_x = world.half_w if team.side == "left" else -world.half_w
-            r.dbg_action = "FallbackMove"                  # <-- thêm
+            goal_x = self._side_sign * world.half_w
+            r.dbg_action = _DBG_FALLBACK_MOVE
             r.command_face_point(goal_x, 0.0)
             r.command_move_towards(goal_x, 0.0, speed=1.2)
 
@@ -191,58 +239,39 @@ class StrategyPlannerFull:
         r = team.get(rid)
         if not r or not r.active:
             return
-        act = self._seek_cache.get(rid)
+        tbl = self._seek_table
+        if rid >= len(tbl):
+            tbl.extend([None] * (rid + 1 - len(tbl)))
+        act = tbl[rid]
         if act is None:
             act = SeekBall(approach_speed=1.8, capture_dist=0.35)
-            self._seek_cache[rid] = act
-        r.dbg_action = "SeekBall"                 # <-- thêm
-        act.tick(world, team, r, dt=0.0)
-
-    def _pos_playing_ball(self, world: World, team: Team, rid: int) -> None:
-        r = team.get(rid)
-        if not r or not r.active:
-            return
-        act = self._pos_play_cache.get(rid)
-        if act is None:
-            act = PositioningPlayingBall(offset_back=1.2, offset_side=0.8)
-            self._pos_play_cache[rid] = act
-        r.dbg_action = "PositioningPlayingBall"   # <-- thêm
-        act.tick(world, team, r, dt=0.0)
-
-    def _assist(self, world: World, team: Team, rid: int) -> None:
-        r = team.get(rid)
-        if not r or not r.active:
-            return
-        act = self._assist_cache.get(rid)
-        if act is None:
-            act = PositioningAssist(radial=2.5, angle_deg=35)
-            self._assist_cache[rid] = act
-        r.dbg_action = "PositioningAssist"        # <-- thêm
+            tbl[rid] = act
+        if r.dbg_action is not _DBG_SEEK:
+            r.dbg_action = _DBG_SEEK
         act.tick(world, team, r, dt=0.0)
 
-    def _defend(self, world: World, team: Team, rid: int, depth: float = 2.5) -> None:
-        r = team.get(rid)
-        if not r or not r.active:
-            return
-        act = self._def_cache.get(rid)
-        if act is None:
-            act = PositioningDefense(depth=depth)
-            self._def_cache[rid] = act
-        else:
-            act.depth = depth
-        r.dbg_action = "PositioningDefense"       # <-- thêm
-        act.tick(world, team, r, dt=0.0)
+    def _push_role(self, assigns: List[Tuple[Robot, int, float, str]],
+                   r: Robot, role: int, depth: float, dbg: str) -> None:
+        if r.active:
+            assigns.append((r, role, depth, dbg))
 
-    def _goalkeep(self, world: World, team: Team, rid: int) -> None:
-        r = team.get(rid)
-        if not r or not r.active:
+    def _dispatch_positioning(self, world: World, team: Team,
+                              assigns: List[Tuple[Robot, int, float, str]]) -> None:
+        """Tính target cho mọi vai trò positioning trong 1 lượt NumPy rồi phát lệnh."""
+        if not assigns:
             return
-        act = self._gk_cache.get(rid)
-        if act is None:
-            act = GoalKeeping(line_depth=0.4)
-            self._gk_cache[rid] = act
-        r.dbg_action = "GoalKeeping"              # <-- thêm
-        act.tick(world, team, r, dt=0.0)
+        n = len(assigns)
+        roles = np.fromiter((a[1] for a in assigns), dtype=np.int64, count=n)
+        rids = np.fromiter((a[0].robot_id for a in assigns), dtype=np.int64, count=n)
+        depths = np.fromiter((a[2] for a in assigns), dtype=np.float64, count=n)
+        tx, ty = self._batch_targets(world, team, roles, rids, depths)
+        bx, by = world.ball.x, world.ball.y
+        for (r, role, _depth, dbg), x, y in zip(assigns, tx, ty):
+            if r.dbg_action is not dbg:   # nhãn intern — so identity là đủ
+                r.dbg_action = dbg
+            r.command_face_point(bx, by)
+            r.command_move_towards(float(x), float(y),
+                                   speed=1.8 if role == ROLE_GK else 1.6)
 
 
     # ------------------------ utilities ------------------------
@@ -253,23 +282,3 @@ class StrategyPlannerFull:
                 return rid
         return None
 
-    def _nearest_to_ball(self, world: World, team: Team, exclude: set[int] = set()) -> Optional[int]:
-        bx, by = world.ball.x, world.ball.y
-        best_id, best_d2 = None, 1e18
-        for rid, r in team.robots.items():
-            if not r.active or rid in exclude:
-                continue
-            d2 = (r.x - bx) ** 2 + (r.y - by) ** 2
-            if d2 < best_d2:
-                best_d2, best_id = d2, rid
-        return best_id
-
-    def _select_goalkeeper(self, world: World, team: Team) -> int:
-        """Chọn robot gần khung thành nhà nhất làm GK."""
-        own_goal_x = -world.half_w if team.side == "left" else world.half_w
-        best_id, best = list(team.robots.keys())[0], 1e18
-        for rid, r in team.robots.items():
-            d = abs(r.x - own_goal_x)
-            if d < best:
-                best, best_id = d, rid
-        return best_id
@@ -0,0 +1,40 @@
+# graphics/_transforms.py
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+try:
+    from numba import njit  # tùy chọn — không có numba vẫn chạy (fallback numpy)
+except ImportError:  # pragma: no cover
+    njit = None
+
+_RAD2DEG = 180.0 / math.pi
+
+
+def _m2px_batch_core(xs, ys, thetas, scale, cx, cy, out_px, out_py, out_deg):
+    """Đổi (x, y, theta) hệ mét → (px, py, deg) hệ pixel cho cả mảng.
+
+    Viết dạng vòng lặp thuần để numba biên dịch được; đừng gọi trực tiếp —
+    dùng m2px_batch bên dưới.
+    """
+    for i in range(xs.shape[0]):
+        out_px[i] = xs[i] * scale + cx
+        out_py[i] = cy - ys[i] * scale
+        out_deg[i] = -thetas[i] * _RAD2DEG
+
+
+if njit is not None:
+    m2px_batch = njit(
+        "void(f8[:], f8[:], f8[:], f8, f8, f8, f8[:], f8[:], f8[:])",
+        cache=True, fastmath=True,
+    )(_m2px_batch_core)
+else:
+    def m2px_batch(xs, ys, thetas, scale, cx, cy, out_px, out_py, out_deg):
+        """Fallback numpy vector hoá khi không có numba (cùng chữ ký)."""
+        np.multiply(xs, scale, out=out_px)
+        out_px += cx
+        np.multiply(ys, -scale, out=out_py)
+        out_py += cy
+        np.multiply(thetas, -_RAD2DEG, out=out_deg)
@@ -2,12 +2,13 @@
 from __future__ import annotations
 
 import math
-from collections import deque
-from typing import Deque, Optional
+from typing import Optional, Tuple
+
+import numpy as np
 
 from PyQt5.QtWidgets import QGraphicsItemGroup, QGraphicsEllipseItem, QGraphicsLineItem, QGraphicsPathItem, QGraphicsScene
 from PyQt5.QtGui import QBrush, QPen, QPainterPath, QColor
-from PyQt5.QtCore import Qt, QPointF
+from PyQt5.QtCore import Qt, QPointF, QTimer
 
 from utils.geom import m2px, len_m2px
 from config.constants import BALL_RADIUS, SCALE
@@ -71,7 +72,11 @@ class BallItem(QGraphicsItemGroup):
         # ---- vệt quỹ đạo (trail) ----
         self._trail_enabled = bool(trail_enabled)
         self._trail_cap = max(4, int(trail_capacity))
-        self._trail_pts: Deque[QPointF] = deque(maxlen=self._trail_cap)  # điểm ở scene-coords (px)
+        # ring buffer (cap, 2) px — float thuần, không cấp phát QPointF mỗi điểm
+        self._trail_buf = np.empty((self._trail_cap, 2), dtype=np.float64)
+        self._trail_len = 0   # số điểm hợp lệ
+        self._trail_head = 0  # chỉ số điểm cũ nhất khi ring đã đầy
+        self._trail_path = QPainterPath()   # path dựng tăng dần — chỉ rebuild khi ring tràn
         self._trail: Optional[QGraphicsPathItem] = QGraphicsPathItem() if self._trail_enabled else None
         if self._trail is not None:
             pen = QPen(QColor(trail_color))
@@ -83,6 +88,14 @@ class BallItem(QGraphicsItemGroup):
         # Tâm quay/đặt tại (0,0) local
         self.setTransformOriginPoint(0.0, 0.0)
 
+        # vị trí px lần sync trước — để bỏ qua frame bóng đứng yên
+        self._last_pos_px: Optional[QPointF] = None
+
+        # trạng thái mới nhất từ vật lý — render tiêu thụ theo nhịp riêng,
+        # vật lý chạy nhanh hơn màn hình thì chỉ frame cuối được vẽ
+        self._pending: Optional[Tuple[float, float, Optional[float], Optional[float]]] = None
+        self._render_timer: Optional[QTimer] = None
+
     # ------------------ API công khai ------------------
 
     def add_to_scene(self, scene: QGraphicsScene) -> None:
@@ -95,10 +108,13 @@ class BallItem(QGraphicsItemGroup):
         self._body.setBrush(QBrush(QColor(color)))
 
     def set_radius(self, radius_m: float) -> None:
-        """Cập nhật bán kính bóng (m) và hình học liên quan."""
+        """Cập nhật bán kính bóng (m) và hình học liên quan (chỉ khi đổi thật)."""
+        r_px = len_m2px(float(radius_m))
+        if r_px == self._r_px:
+            return
         self._r_m = float(radius_m)
-        self._r_px = len_m2px(self._r_m)
-        self._body.setRect(-self._r_px, -self._r_px, 2 * self._r_px, 2 * self._r_px)
+        self._r_px = r_px
+        self._body.setRect(-r_px, -r_px, 2 * r_px, 2 * r_px)
         self._update_highlight_rect()
 
     def set_trail_enabled(self, enabled: bool, scene: Optional[QGraphicsScene] = None) -> None:
@@ -118,43 +134,94 @@ class BallItem(QGraphicsItemGroup):
                 self._trail.scene().removeItem(self._trail)
             self._trail = None
             self._trail_enabled = False
-            self._trail_pts.clear()
+            self._trail_len = 0
+            self._trail_head = 0
+            self._trail_path = QPainterPath()
 
     def clear_trail(self) -> None:
-        self._trail_pts.clear()
+        self._trail_len = 0
+        self._trail_head = 0
+        self._trail_path = QPainterPath()
         if self._trail is not None:
-            self._trail.setPath(QPainterPath())
+            self._trail.setPath(self._trail_path)
+
+    def update_state(self, x_m: float, y_m: float,
+                     vx: float | None = None, vy: float | None = None) -> None:
+        """Nhận trạng thái từ tick vật lý — chỉ ghi buffer, không đụng scene-graph."""
+        self._pending = (x_m, y_m, vx, vy)
+
+    def render(self) -> None:
+        """Tiêu thụ trạng thái pending và cập nhật scene (gọi từ GUI thread)."""
+        st = self._pending
+        if st is None:
+            return
+        self._pending = None
+        self._render(*st)
+
+    def start_render_timer(self, hz: int = 60) -> QTimer:
+        """Tạo QTimer vẽ bóng theo nhịp cố định, tách khỏi nhịp vật lý."""
+        if self._render_timer is None:
+            self._render_timer = QTimer()
+            self._render_timer.timeout.connect(self.render)
+            self._render_timer.start(max(1, int(1000 / hz)))
+        return self._render_timer
 
     def sync(self, x_m: float, y_m: float, vx: float | None = None, vy: float | None = None) -> None:
-        """Đồng bộ vị trí (bắt buộc) và mũi vận tốc/vệt (tuỳ chọn)."""
+        """Đồng bộ ngay lập tức (đường cũ — khi không dùng timer render riêng)."""
+        self._pending = None
+        self._render(x_m, y_m, vx, vy)
+
+    def _render(self, x_m: float, y_m: float, vx: float | None, vy: float | None) -> None:
         # --- vị trí (group đặt theo scene coords) ---
         pos_px = m2px(x_m, y_m)
+        # bóng đứng yên & vị trí không đổi → khỏi động vào scene-graph frame này
+        if not vx and not vy and pos_px == self._last_pos_px:
+            return
+        self._last_pos_px = pos_px
         self.setPos(pos_px)
 
         # --- mũi vận tốc ---
         if self._vline is not None and vx is not None and vy is not None:
-            # local coords có Oy xuống, nên y_px = -vy
-            length_m = math.hypot(vx, vy) * self._vel_scale  # m → scale
-            dx_px = len_m2px(length_m) * (vx / (math.hypot(vx, vy) + 1e-12))
-            dy_px = len_m2px(length_m) * (-vy / (math.hypot(vx, vy) + 1e-12))
-            self._vline.setLine(0.0, 0.0, dx_px, dy_px)
-            self._vline.setVisible(length_m > 1e-3)
+            # local coords có Oy xuống, nên y_px = -vy; hypot tính 1 lần duy nhất
+            spd = math.hypot(vx, vy)
+            length_m = spd * self._vel_scale  # m → scale
+            if spd > 1e-9:
+                inv = len_m2px(length_m) / spd
+                self._vline.setLine(0.0, 0.0, inv * vx, -inv * vy)
+                self._vline.setVisible(length_m > 1e-3)
+            else:
+                self._vline.setVisible(False)
         elif self._vline is not None:
             self._vline.setVisible(False)
 
-        # --- vệt quỹ đạo ---
+        # --- vệt quỹ đạo: append O(1) vào ring float, chỉ dựng lại khi ring tràn ---
         if self._trail is not None:
-            self._trail_pts.append(QPointF(pos_px))
-            path = QPainterPath()
-            # vẽ mượt: bắt đầu từ điểm đầu tiên
-            pts = list(self._trail_pts)
-            if len(pts) >= 2:
-                path.moveTo(pts[0])
-                for p in pts[1:]:
-                    path.lineTo(p)
+            buf = self._trail_buf
+            cap = self._trail_cap
+            x_px, y_px = pos_px.x(), pos_px.y()
+            if self._trail_len < cap:
+                buf[self._trail_len, 0] = x_px
+                buf[self._trail_len, 1] = y_px
+                self._trail_len += 1
+                if self._trail_path.elementCount() == 0:
+                    self._trail_path.moveTo(x_px, y_px)
+                else:
+                    self._trail_path.lineTo(x_px, y_px)
             else:
-                path.moveTo(pos_px)
-            self._trail.setPath(path)
+                # ring đầy: ghi đè điểm cũ nhất rồi dựng lại theo thứ tự vòng
+                head = self._trail_head
+                buf[head, 0] = x_px
+                buf[head, 1] = y_px
+                head = self._trail_head = (head + 1) % cap
+                path = QPainterPath()
+                path.moveTo(buf[head, 0], buf[head, 1])
+                for i in range(1, cap):
+                    j = head + i
+                    if j >= cap:
+                        j -= cap
+                    path.lineTo(buf[j, 0], buf[j, 1])
+                self._trail_path = path
+            self._trail.setPath(self._trail_path)
 
     # ------------------ nội bộ ------------------
 
@@ -263,7 +263,8 @@ from typing import Optional
 
 from PyQt5.QtWidgets import (
     QGraphicsRectItem, QGraphicsLineItem,
-    QGraphicsEllipseItem, QGraphicsPathItem, QGraphicsScene
+    QGraphicsEllipseItem, QGraphicsPathItem, QGraphicsScene,
+    QGraphicsItemGroup,
 )
 from PyQt5.QtGui import QBrush, QPen, QColor, QPainterPath
 from PyQt5.QtCore import Qt, QRectF, QPointF
@@ -277,11 +278,12 @@ class FieldDrawer:
     """
     Vẽ sân với hệ toạ độ pixel gốc ở (0,0) góc trái trên (giống file mẫu).
     - Chiều dài thực 22m, rộng 14m. Margin = 1m mỗi cạnh.
-    - Gọi draw(scene) sẽ scene.clear() rồi vẽ lại toàn bộ sân.
+    - draw(scene) dựng group nét vẽ sân; gọi lại chỉ thay group, không clear scene.
     """
 
     def __init__(self, scale: Optional[float] = None):
         self.SCALE = float(CFG_SCALE if scale is None else scale)
+        self.group: Optional[QGraphicsItemGroup] = None  # group nét vẽ sân — thay mới khi redraw
         self.init_parameters()
 
     # ------- tham số dựng hình (theo file mẫu) -------
@@ -307,119 +309,126 @@ class FieldDrawer:
         self.GOAL_DEPTH  = 0.7 * s
         self.GOAL_HEIGHT = 2.5 * s
 
-    # ------- API chính -------
-    def draw(self, scene: QGraphicsScene):
-        scene.clear()
-        self.draw_background(scene)
-        self.draw_border(scene)
-        self.draw_center_line(scene)
-        self.draw_center_circle(scene)
-        self.draw_penalty_area(scene, self.MARGIN, True)                      # trái
-        self.draw_penalty_area(scene, self.WIDTH - self.MARGIN, False)        # phải
-        self.draw_corners(scene)
-        self.draw_goal(scene, self.MARGIN - self.GOAL_DEPTH, True)            # trái
-        self.draw_goal(scene, self.WIDTH - self.MARGIN, False)                # phải
-
-    # ------- các phần vẽ -------
-    def draw_background(self, scene: QGraphicsScene):
-        field = QGraphicsRectItem(0, 0, self.WIDTH, self.HEIGHT)
-        field.setBrush(QBrush(QColor(0, 153, 0)))
-        field.setPen(QPen(Qt.NoPen))
-        scene.addItem(field)
-
-    def draw_border(self, scene: QGraphicsScene):
-        border = QGraphicsRectItem(self.MARGIN, self.MARGIN,
-                                   self.FIELD_WIDTH, self.FIELD_HEIGHT)
-        border.setPen(QPen(Qt.white, self.K))
-        border.setBrush(QBrush(Qt.NoBrush))
-        scene.addItem(border)
-
-    def draw_center_line(self, scene: QGraphicsScene):
-        center_line = QGraphicsLineItem(self.WIDTH / 2, self.MARGIN,
-                                        self.WIDTH / 2, self.HEIGHT - self.MARGIN)
-        center_line.setPen(QPen(Qt.white, self.K))
-        scene.addItem(center_line)
-
-    def draw_center_circle(self, scene: QGraphicsScene):
-        center = QPointF(self.WIDTH / 2, self.HEIGHT / 2)
-        circle = QGraphicsEllipseItem(center.x() - self.H, center.y() - self.H,
-                                      2 * self.H, 2 * self.H)
-        circle.setPen(QPen(Qt.white, self.K))
-        circle.setBrush(QBrush(Qt.NoBrush))
-        scene.addItem(circle)
-
-        dot = QGraphicsEllipseItem(center.x() - self.J, center.y() - self.J,
-                                   2 * self.J, 2 * self.J)
-        dot.setBrush(QBrush(Qt.white))
-        dot.setPen(QPen(Qt.NoPen))
-        scene.addItem(dot)
-
-    def draw_penalty_area(self, scene: QGraphicsScene, x_pos: float, is_left: bool):
-        # Vùng cấm lớn
-        rect = QGraphicsRectItem(x_pos,
-                                 self.HEIGHT / 2 - self.C / 2,
-                                 ( self.E if is_left else -self.E),
-                                 self.C)
-        rect.setPen(QPen(Qt.white, self.K))
-        rect.setBrush(QBrush(Qt.NoBrush))
-        scene.addItem(rect)
-
-        # Chấm phạt
-        dot_x = x_pos + ( self.I if is_left else -self.I )
-        penalty_dot = QGraphicsEllipseItem(dot_x - self.J,
-                                           self.HEIGHT / 2 - self.J,
-                                           2 * self.J, 2 * self.J)
-        penalty_dot.setBrush(QBrush(Qt.white))
-        penalty_dot.setPen(QPen(Qt.NoPen))
-        scene.addItem(penalty_dot)
-
-        # Small box
-        small_rect = QGraphicsRectItem(x_pos,
-                                       self.HEIGHT / 2 - self.D / 2,
-                                       ( self.F if is_left else -self.F),
-                                       self.D)
-        small_rect.setPen(QPen(Qt.white, self.K))
-        small_rect.setBrush(QBrush(Qt.NoBrush))
-        scene.addItem(small_rect)
-
-    def draw_corners(self, scene: QGraphicsScene):
-        # (x, y, góc bắt đầu, góc kết thúc) theo rad
-        positions = [
-            (self.MARGIN,                   self.MARGIN,                    3*math.pi/2, 2*math.pi),     # TL
-            (self.MARGIN,                   self.HEIGHT - self.MARGIN,      0,            math.pi/2),     # BL
-            (self.WIDTH - self.MARGIN,      self.MARGIN,                    math.pi,      3*math.pi/2),   # TR
-            (self.WIDTH - self.MARGIN,      self.HEIGHT - self.MARGIN,      math.pi/2,    math.pi),       # BR
-        ]
-        for x, y, start_angle, end_angle in positions:
+        # Pen/brush dựng 1 lần — các draw_* dùng lại, khỏi cấp phát Qt object mỗi lần vẽ
+        self._pen_line    = QPen(Qt.white, self.K)
+        self._pen_none    = QPen(Qt.NoPen)
+        self._brush_turf  = QBrush(QColor(0, 153, 0))
+        self._brush_white = QBrush(Qt.white)
+        self._brush_net   = QBrush(QColor(255, 255, 255, 100))
+
+        # --- hình học px tĩnh — tính 1 lần, draw_* chỉ cấp phát item từ cache ---
+        W, H2 = self.WIDTH, self.HEIGHT / 2
+        self._rect_field  = QRectF(0, 0, self.WIDTH, self.HEIGHT)
+        self._rect_border = QRectF(self.MARGIN, self.MARGIN, self.FIELD_WIDTH, self.FIELD_HEIGHT)
+        self._center_line = (W / 2, self.MARGIN, W / 2, self.HEIGHT - self.MARGIN)
+        self._rect_circle = QRectF(W / 2 - self.H, H2 - self.H, 2 * self.H, 2 * self.H)
+        self._rect_center_dot = QRectF(W / 2 - self.J, H2 - self.J, 2 * self.J, 2 * self.J)
+
+        # vùng cấm + chấm phạt + small box 2 bên (trái trước)
+        self._penalty_rects = []
+        self._penalty_dots = []
+        self._small_rects = []
+        for x_pos, is_left in ((self.MARGIN, True), (W - self.MARGIN, False)):
+            e = self.E if is_left else -self.E
+            f = self.F if is_left else -self.F
+            dot_x = x_pos + (self.I if is_left else -self.I)
+            self._penalty_rects.append(QRectF(x_pos, H2 - self.C / 2, e, self.C).normalized())
+            self._penalty_dots.append(QRectF(dot_x - self.J, H2 - self.J, 2 * self.J, 2 * self.J))
+            self._small_rects.append(QRectF(x_pos, H2 - self.D / 2, f, self.D).normalized())
+
+        # cung phạt góc — 4 QPainterPath tessellate 1 lần (arcTo có trig)
+        self._corner_paths = []
+        for x, y, start_angle, end_angle in (
+            (self.MARGIN,              self.MARGIN,               3 * math.pi / 2, 2 * math.pi),    # TL
+            (self.MARGIN,              self.HEIGHT - self.MARGIN, 0,               math.pi / 2),    # BL
+            (self.WIDTH - self.MARGIN, self.MARGIN,               math.pi,         3 * math.pi / 2),# TR
+            (self.WIDTH - self.MARGIN, self.HEIGHT - self.MARGIN, math.pi / 2,     math.pi),        # BR
+        ):
             path = QPainterPath()
             path.moveTo(x, y)
             # arcTo(x, y, w, h, startAngleDeg, sweepLengthDeg)
             path.arcTo(x - self.G, y - self.G, 2 * self.G, 2 * self.G,
                        start_angle * 180 / math.pi,
                        (end_angle - start_angle) * 180 / math.pi)
-            corner = QGraphicsPathItem(path)
-            corner.setPen(QPen(Qt.white, self.K))
-            corner.setBrush(QBrush(Qt.NoBrush))
-            scene.addItem(corner)
-
-    def draw_goal(self, scene: QGraphicsScene, x_pos: float, is_left: bool):
-        # Khung thành (hình chữ nhật)
-        goal = QGraphicsRectItem(x_pos,
-                                 self.HEIGHT / 2 - self.GOAL_HEIGHT / 2,
-                                 self.GOAL_DEPTH, self.GOAL_HEIGHT)
-        goal.setPen(QPen(Qt.white, self.K))
-        goal.setBrush(QBrush(Qt.NoBrush))
-        scene.addItem(goal)
-
-        # Lưới mờ
-        net_x = x_pos if is_left else (x_pos + self.GOAL_DEPTH)
-        net_w = (-self.GOAL_DEPTH * 0.3) if is_left else (self.GOAL_DEPTH * 0.3)
-        net = QGraphicsRectItem(net_x,
-                                self.HEIGHT / 2 - self.GOAL_HEIGHT / 2,
-                                net_w, self.GOAL_HEIGHT)
-        net.setBrush(QBrush(QColor(255, 255, 255, 100)))
-        net.setPen(QPen(Qt.NoPen))
-        scene.addItem(net)
+            self._corner_paths.append(path)
+
+        # khung thành + lưới mờ 2 bên
+        self._goal_rects = []
+        self._net_rects = []
+        for x_pos, is_left in ((self.MARGIN - self.GOAL_DEPTH, True), (W - self.MARGIN, False)):
+            self._goal_rects.append(
+                QRectF(x_pos, H2 - self.GOAL_HEIGHT / 2, self.GOAL_DEPTH, self.GOAL_HEIGHT))
+            net_x = x_pos if is_left else (x_pos + self.GOAL_DEPTH)
+            net_w = (-self.GOAL_DEPTH * 0.3) if is_left else (self.GOAL_DEPTH * 0.3)
+            self._net_rects.append(
+                QRectF(net_x, H2 - self.GOAL_HEIGHT / 2, net_w, self.GOAL_HEIGHT).normalized())
+
+        # --- gộp toàn bộ nét trắng tĩnh vào 1 path → 1 item, 1 draw call ---
+        sp = QPainterPath()
+        sp.addRect(self._rect_border)
+        sp.moveTo(self._center_line[0], self._center_line[1])
+        sp.lineTo(self._center_line[2], self._center_line[3])
+        sp.addEllipse(self._rect_circle)
+        for r in self._penalty_rects + self._small_rects + self._goal_rects:
+            sp.addRect(r)
+        for p in self._corner_paths:
+            sp.addPath(p)
+        self._static_path = sp
+
+        # chấm giữa + chấm phạt — path fill trắng riêng (stroke vs fill khác pen)
+        dp = QPainterPath()
+        dp.addEllipse(self._rect_center_dot)
+        for r in self._penalty_dots:
+            dp.addEllipse(r)
+        self._dots_path = dp
+
+    # ------- API chính -------
+    def draw(self, scene: QGraphicsScene) -> QGraphicsItemGroup:
+        # Không scene.clear() — chỉ thay group sân, robot/ball trong scene giữ nguyên.
+        # Chặn signal changed trong lúc tháo/lắp để gom về 1 lần invalidate.
+        scene.blockSignals(True)
+        try:
+            if self.group is not None:
+                scene.removeItem(self.group)
+            group = QGraphicsItemGroup()
+            self.group = group
+            self.draw_background(group)
+            self.draw_lines(group)
+            self.draw_dots(group)
+            self.draw_nets(group)
+            # sân tĩnh sau draw() — cache raster theo toạ độ device:
+            # repaint chỉ blit pixmap thay vì stroke lại path/cung mỗi frame
+            group.setCacheMode(QGraphicsItemGroup.DeviceCoordinateCache)
+            scene.addItem(group)
+        finally:
+            scene.blockSignals(False)
+            scene.invalidate()
+        return group
+
+    # ------- các phần vẽ -------
+    def draw_background(self, group: QGraphicsItemGroup):
+        field = QGraphicsRectItem(self._rect_field, group)
+        field.setBrush(self._brush_turf)
+        field.setPen(self._pen_none)
+
+    def draw_lines(self, group: QGraphicsItemGroup):
+        """Toàn bộ vạch vôi (biên, vạch giữa, vòng tròn, vùng cấm, cung góc,
+        khung thành) trong MỘT QGraphicsPathItem — 1 paint node thay vì ~11."""
+        lines = QGraphicsPathItem(self._static_path, group)
+        lines.setPen(self._pen_line)
+
+    def draw_dots(self, group: QGraphicsItemGroup):
+        """Chấm giữa sân + 2 chấm phạt — path fill trắng."""
+        dots = QGraphicsPathItem(self._dots_path, group)
+        dots.setBrush(self._brush_white)
+        dots.setPen(self._pen_none)
+
+    def draw_nets(self, group: QGraphicsItemGroup):
+        """Lưới mờ sau khung thành (fill bán trong suốt, tách khỏi vạch vôi)."""
+        for rect_net in self._net_rects:
+            net = QGraphicsRectItem(rect_net, group)
+            net.setBrush(self._brush_net)
+            net.setPen(self._pen_none)
 
     # ------- tiện ích phụ (giữ cho tương thích nếu nơi khác có dùng) -------
     def get_dimensions(self):
@@ -10,6 +10,10 @@ class SceneManager:
     def __init__(self, world: World):
         self.world = world
         self.scene = QGraphicsScene()
+        # Bất biến: scene nhỏ (<50 item) nhưng robot/bóng di chuyển mỗi frame —
+        # BSP index rebuild sau mỗi setPos trội hơn hẳn quét tuyến tính ở N nhỏ;
+        # luôn chạy NoIndex (xem set_large_scene_mode nếu sau này N lên hàng nghìn).
+        self.scene.setItemIndexMethod(QGraphicsScene.NoIndex)
         FieldDrawer().draw(self.scene)
 
         self.gfx_left  = TeamGraphic(world.team_left,  self.scene, Qt.blue)
@@ -22,8 +26,17 @@ class SceneManager:
         self.gfx_left.ensure_items()
         self.gfx_right.ensure_items()
 
+        # bóng vẽ theo nhịp 60 Hz riêng — tick vật lý chỉ ghi buffer,
+        # chạy vật lý nhanh hơn màn hình không làm thrash scene-graph
+        self.ball.start_render_timer(60)
+
+    def set_large_scene_mode(self, enabled: bool = True):
+        """Bật lại BSP index nếu scene tương lai có hàng nghìn item (replay, overlay...)."""
+        self.scene.setItemIndexMethod(
+            QGraphicsScene.BspTreeIndex if enabled else QGraphicsScene.NoIndex)
+
     def sync(self):
         self.gfx_left.sync()
         self.gfx_right.sync()
         b = self.world.ball
-        self.ball.sync(b.x, b.y, b.vx, b.vy)
+        self.ball.update_state(b.x, b.y, b.vx, b.vy)
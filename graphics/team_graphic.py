@@ -116,75 +116,130 @@ class TeamGraphic:
 from __future__ import annotations
 
 import math
-from typing import Dict
+from typing import Dict, Optional
+
+import numpy as np
 
 from PyQt5.QtWidgets import (
-    QGraphicsItemGroup, QGraphicsRectItem, QGraphicsPathItem,
+    QGraphicsItem, QGraphicsItemGroup, QGraphicsRectItem, QGraphicsPathItem,
     QGraphicsTextItem, QGraphicsEllipseItem, QGraphicsScene,
     QGraphicsSimpleTextItem
 )
-from PyQt5.QtGui import QBrush, QPen, QPainterPath, QFont, QColor
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QBrush, QPen, QPainterPath, QFont, QColor, QTransform
+from PyQt5.QtCore import Qt, QRectF
 
 from utils.geom import m2px, len_m2px
+from config.constants import FIELD_W, FIELD_H, SCALE, MARGIN
 from models.team import Team
+from ._transforms import m2px_batch
+
+# affine m → px (trùng utils.geom.m2px) — gấp sẵn để tính vector hoá cả đội
+_PX_CX = MARGIN + (FIELD_W * SCALE) * 0.5
+_PX_CY = MARGIN + (FIELD_H * SCALE) * 0.5
+_RAD2DEG = 180.0 / math.pi
 
 
 class RobotItem(QGraphicsItemGroup):
     """Một robot vẽ dạng hình vuông + mũi hướng + nhãn ID + halo khi giữ bóng."""
+
+    # hình học bất biến chia sẻ giữa mọi robot cùng cạnh — key = s_px
+    _tri_path_cache: Dict[float, QPainterPath] = {}
+    _body_rect_cache: Dict[float, QRectF] = {}
+
     def __init__(self, side_m: float, color: QColor, robot_id: int):
         super().__init__()
 
         s_px = len_m2px(side_m)
 
         # Thân vuông, tâm tại (0,0)
-        body = QGraphicsRectItem(-s_px / 2, -s_px / 2, s_px, s_px, self)
+        body_rect = self._body_rect_cache.get(s_px)
+        if body_rect is None:
+            body_rect = QRectF(-s_px / 2, -s_px / 2, s_px, s_px)
+            self._body_rect_cache[s_px] = body_rect
+        body = QGraphicsRectItem(body_rect, self)
         body.setBrush(QBrush(color))
-        body.setPen(QPen(Qt.black, 1.5))
+        # viền thường / viền vàng khi giữ bóng — thay pen rẻ hơn nuôi 1 ellipse halo riêng
+        self._pen_normal = QPen(Qt.black, 1.5)
+        self._pen_has_ball = QPen(QColor("yellow"), 3)
+        body.setPen(self._pen_normal)
         body.setZValue(1)
 
-        # Mũi hướng (tam giác, trỏ về +x local)
+        # Mũi hướng (tam giác, trỏ về +x local) — path dựng 1 lần cho mỗi cỡ robot
         tri = QGraphicsPathItem(self)
         tri.setZValue(2)
-        path = QPainterPath()
-        path.moveTo(+0.45 * s_px, 0.0)
-        path.lineTo(-0.15 * s_px, -0.22 * s_px)
-        path.lineTo(-0.15 * s_px, +0.22 * s_px)
-        path.closeSubpath()
+        path = self._tri_path_cache.get(s_px)
+        if path is None:
+            path = QPainterPath()
+            path.moveTo(+0.45 * s_px, 0.0)
+            path.lineTo(-0.15 * s_px, -0.22 * s_px)
+            path.lineTo(-0.15 * s_px, +0.22 * s_px)
+            path.closeSubpath()
+            self._tri_path_cache[s_px] = path
         tri.setPath(path)
         tri.setBrush(QBrush(Qt.white))
         tri.setPen(QPen(Qt.NoPen))
 
-        # Nhãn ID (nằm trên góc)
-        label = QGraphicsTextItem(str(robot_id), self)
+        # Nhãn ID (nằm trên góc) — SimpleTextItem: không kéo QTextDocument vào chỉ vì 1-2 ký tự
+        label = QGraphicsSimpleTextItem(str(robot_id), self)
         label.setFont(QFont("Arial", 9, weight=QFont.Bold))
-        label.setDefaultTextColor(Qt.black)
+        label.setBrush(QBrush(Qt.black))
         label.setPos(-0.5 * s_px, -0.6 * s_px)  # đặt góc trên-trái
         label.setZValue(3)
 
-        # Halo khi has_ball
-        halo_r = 0.6 * s_px
-        halo = QGraphicsEllipseItem(-halo_r, -halo_r, 2 * halo_r, 2 * halo_r, self)
-        halo.setPen(QPen(QColor("yellow"), 2))
-        halo.setBrush(QBrush(Qt.NoBrush))
-        halo.setZValue(0)
-        halo.setVisible(False)
+        # Nhãn action — con của robot, neo tại tâm; ItemIgnoresTransformations
+        # để Qt tự giữ nhãn không xoay/không scale theo robot, khỏi setPos mỗi frame
+        self._action_label = QGraphicsSimpleTextItem(self)
+        self._action_label.setFont(QFont("DejaVu Sans", 11))
+        self._action_label.setBrush(QBrush(QColor("#ffffff")))
+        self._action_label.setZValue(200)
+        self._action_label.setFlag(QGraphicsItem.ItemIgnoresTransformations, True)
+        self._action_text = ""
+        self._action_offset_px = s_px * 0.5 + 16  # nửa cạnh + 16px phía trên
 
         # Lưu refs
         self._s_px = s_px
         self._body = body
         self._tri = tri
         self._label = label
-        self._halo = halo
+
+        # trạng thái lần sync trước — robot đứng yên thì khỏi gọi setter Qt nào
+        self._last = (None, None, None, None, None)
 
         # Tâm quay tại tâm hình vuông
         self.setTransformOriginPoint(0.0, 0.0)
 
     def sync(self, x_m: float, y_m: float, theta_rad: float, active: bool, has_ball: bool):
-        self.setPos(m2px(x_m, y_m))
-        self.setRotation(-math.degrees(theta_rad))  # Qt dùng degree, CW
-        self.setOpacity(1.0 if active else 0.3)
-        self._halo.setVisible(has_ball)
+        self.sync_px(_PX_CX + x_m * SCALE, _PX_CY - y_m * SCALE,
+                     -theta_rad * _RAD2DEG, active, has_ball)
+
+    def sync_px(self, px: float, py: float, deg: float, active: bool, has_ball: bool):
+        """Như sync() nhưng nhận toạ độ đã đổi sẵn sang px/deg (TeamGraphic tính vector hoá)."""
+        lx, ly, ldeg, lact, lball = self._last
+        if px == lx and py == ly and deg == ldeg and active == lact and has_ball == lball:
+            return
+        self._last = (px, py, deg, active, has_ball)
+
+        # chỉ động vào field thực sự đổi — mỗi setter là 1 transaction C++
+        if px != lx or py != ly:
+            self.setPos(px, py)
+        if deg != ldeg:
+            self.setRotation(deg)  # Qt dùng degree, CW
+        if active != lact:
+            self.setOpacity(1.0 if active else 0.3)
+        if has_ball != lball:
+            self._body.setPen(self._pen_has_ball if has_ball else self._pen_normal)
+
+    def set_action_text(self, text: str):
+        """Đổi text nhãn action; chỉ đo lại bề rộng/canh giữa khi text thực sự đổi."""
+        if text == self._action_text:
+            return
+        self._action_text = text
+        lbl = self._action_label
+        lbl.setText(text)
+        half_w = lbl.boundingRect().width() / 2.0
+        # transform riêng của item vẫn áp dụng trong hệ device →
+        # dịch nhãn lên trên robot + canh giữa, bất chấp robot xoay
+        lbl.setTransform(QTransform.fromTranslate(-half_w, -self._action_offset_px))
 
 
 class TeamGraphic:
@@ -197,66 +252,73 @@ class TeamGraphic:
         self.team = team
         self.scene = scene
         self.color = QColor(color)
-        self.items: Dict[int, RobotItem] = {}                  # robot_id -> RobotItem
-        self.labels: Dict[int, QGraphicsSimpleTextItem] = {}   # robot_id -> label action
-        self._font = QFont("DejaVu Sans", 11)
+        self.items: Dict[int, RobotItem] = {}  # robot_id -> RobotItem
+        # buffer 6 hàng (x, y, theta, px, py, deg) dùng lại giữa các frame —
+        # kernel m2px_batch (njit nếu có) ghi thẳng vào 3 hàng out
+        self._pose_buf: Optional[np.ndarray] = None
+        # version roster lần ensure_items gần nhất — đội hình ổn định thì bỏ qua rescan
+        self._last_roster_version = -1
 
     # Tạo item/label mới nếu robot mới xuất hiện; xóa nếu robot biến mất
-    def ensure_items(self):
-        current_ids = {r.robot_id for r in self.team.robots_list()}
-
-        # remove những item/label không còn trong đội
-        for rid in list(self.items.keys()):
-            if rid not in current_ids:
-                self.scene.removeItem(self.items[rid])
-                del self.items[rid]
-        for rid in list(self.labels.keys()):
-            if rid not in current_ids:
-                self.scene.removeItem(self.labels[rid])
-                del self.labels[rid]
-
-        # thêm item + label cho robot mới
-        for r in self.team.robots_list():
-            if r.robot_id not in self.items:
-                item = RobotItem(side_m=r.side_len, color=self.color, robot_id=r.robot_id)
-                self.items[r.robot_id] = item
-                self.scene.addItem(item)
-            if r.robot_id not in self.labels:
-                lbl = QGraphicsSimpleTextItem("")   # nhãn action
-                lbl.setFont(self._font)
-                lbl.setBrush(QBrush(QColor("#ffffff")))
-                lbl.setZValue(200)                  # nổi trên robot
-                self.scene.addItem(lbl)
-                self.labels[r.robot_id] = lbl
+    def ensure_items(self, robots=None):
+        # robots: snapshot robots_list() nếu caller đã có — tránh dựng list lần nữa
+        if robots is None:
+            robots = self.team.robots_list()
+        current_ids = {r.robot_id for r in robots}
+        if current_ids == self.items.keys():
+            return  # đội hình không đổi — trường hợp thường gặp mỗi frame
+
+        # gom mọi add/remove về 1 lần phát signal changed
+        self.scene.blockSignals(True)
+        try:
+            # remove những item không còn trong đội
+            for rid in list(self.items.keys()):
+                if rid not in current_ids:
+                    self.scene.removeItem(self.items[rid])
+                    del self.items[rid]
+
+            # thêm item cho robot mới (nhãn action là con của RobotItem)
+            for r in robots:
+                if r.robot_id not in self.items:
+                    item = RobotItem(side_m=r.side_len, color=self.color, robot_id=r.robot_id)
+                    self.items[r.robot_id] = item
+                    self.scene.addItem(item)
+        finally:
+            self.scene.blockSignals(False)
+            self.scene.invalidate()
 
     def sync(self):
-        self.ensure_items()
-        for r in self.team.robots_list():
-            # 1) đồng bộ robot item
-            self.items[r.robot_id].sync(r.x, r.y, r.theta, r.active, r.has_ball)
-
-            # 2) cập nhật nhãn action (không xoay)
-            lbl = self.labels.get(r.robot_id)
-            if not lbl:
-                continue
-
-            text = r.dbg_action or ""
-            if lbl.text() != text:
-                lbl.setText(text)
-
-            # đặt nhãn ngay phía trên robot, canh giữa theo bề rộng text
-            p = m2px(r.x, r.y)  # QPointF px
-            br = lbl.boundingRect()
-            offset_px = len_m2px(max(0.0, r.side_len * 0.5)) + 16  # nửa cạnh + 16px
-            lbl.setPos(p.x() - br.width() / 2.0, p.y() - offset_px)
-
-            # Ẩn/hiện theo trạng thái active
-            lbl.setOpacity(1.0 if r.active else 0.35)
+        robots = self.team.robots_list()   # snapshot 1 lần cho cả frame
+        v = self.team.version
+        if v != self._last_roster_version:  # so version O(1) thay vì rescan roster
+            self.ensure_items(robots)
+            self._last_roster_version = v
+        n = len(robots)
+        if n == 0:
+            return
+
+        # gom (x, y, theta) cả đội rồi đổi m→px / rad→deg bằng kernel batch
+        buf = self._pose_buf
+        if buf is None or buf.shape[1] < n:
+            buf = self._pose_buf = np.empty((6, n), dtype=np.float64)
+        xs, ys, ths = buf[0], buf[1], buf[2]
+        for i, r in enumerate(robots):
+            xs[i] = r.x
+            ys[i] = r.y
+            ths[i] = r.theta
+        px, py, deg = buf[3, :n], buf[4, :n], buf[5, :n]
+        m2px_batch(xs[:n], ys[:n], ths[:n], SCALE, _PX_CX, _PX_CY, px, py, deg)
+
+        items = self.items  # pre-bind — tra local rẻ hơn attribute mỗi vòng
+        for i, r in enumerate(robots):
+            item = items[r.robot_id]
+            # 1) đồng bộ robot item (toạ độ px đã tính sẵn);
+            #    nhãn là con nên Qt tự kéo theo — không cần setPos riêng
+            item.sync_px(px[i], py[i], deg[i], r.active, r.has_ball)
+            # 2) text nhãn action — chỉ đổi khi khác
+            item.set_action_text(r.dbg_action or "")
 
     def clear(self):
         for item in self.items.values():
             self.scene.removeItem(item)
-        for lbl in self.labels.values():
-            self.scene.removeItem(lbl)
         self.items.clear()
-        self.labels.clear()
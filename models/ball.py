@@ -3,9 +3,18 @@ import math
 from dataclasses import dataclass
 from typing import Tuple, Literal, Optional
 
+# kernel tích phân bóng sống ở simulation/physics_core.py (njit nếu có numba)
+from simulation.physics_core import (
+    _BOUND_NONE, _BOUND_CLIP, _BOUND_BOUNCE,
+    step_ball as _ball_step_core,
+)
+
 BoundaryMode = Literal["clip", "bounce"]
 
-@dataclass
+# bán kính mặc định (size 5) — dùng chung cho field default và make_stepper
+_DEFAULT_RADIUS = 0.11
+
+@dataclass(slots=True)
 class Ball:
     x: float = 0.0
     y: float = 0.0
@@ -13,7 +22,7 @@ class Ball:
     vy: float = 0.0
 
     # Tham số vật lý/cấu hình
-    radius: float = 0.11          # ~ đường kính bóng size 5 ~ 0.22 m
+    radius: float = _DEFAULT_RADIUS  # ~ đường kính bóng size 5 ~ 0.22 m
     min_speed: float = 0.05       # m/s, dưới ngưỡng thì coi như dừng
     lin_drag_per_s: float = 1.5   # hệ số cản tuyến tính theo giây (tuỳ chỉnh)
     restitution: float = 0.25     # độ đàn hồi khi bật tường (nếu dùng "bounce")
@@ -33,28 +42,54 @@ class Ball:
         return math.atan2(self.vy, self.vx)
 
     def set_pos(self, x: float, y: float) -> None:
-        self.x = float(x); self.y = float(y)
+        self.x = x; self.y = y
 
     def set_vel(self, vx: float, vy: float) -> None:
-        self.vx = float(vx); self.vy = float(vy)
+        self.vx = vx; self.vy = vy
 
     def set_speed_dir(self, speed: float, theta_rad: float) -> None:
-        self.vx = float(speed) * math.cos(theta_rad)
-        self.vy = float(speed) * math.sin(theta_rad)
+        self.vx = speed * math.cos(theta_rad)
+        self.vy = speed * math.sin(theta_rad)
 
     def apply_impulse(self, jx: float, jy: float) -> None:
         """Cộng thêm vận tốc (đơn giản hoá: coi khối lượng = 1)."""
-        self.vx += float(jx)
-        self.vy += float(jy)
+        self.vx += jx
+        self.vy += jy
 
     def kick(self, speed: float, theta_rad: float) -> None:
         """Gán vận tốc theo lực sút."""
         self.set_speed_dir(speed, theta_rad)
 
+    def attach_to(self, r, d: float) -> None:
+        """Dính bóng trước mũi robot r, cách tâm d (m): vị trí theo heading
+        (trig cache sẵn trên Robot), vận tốc copy thẳng — 1 lời gọi/tick."""
+        c, s = r._cs()
+        self.x = r.x + d * c
+        self.y = r.y + d * s
+        self.vx = r.vx
+        self.vy = r.vy
+
+    # cache (k, dt) → damp — sim fixed-step gọi cùng dt mỗi tick nên gần như luôn hit
+    _damp_key = (-1.0, -1.0)
+    _damp_val = 1.0
+
     def _time_invariant_damping(self, dt: float) -> float:
-        """Hệ số giảm tốc theo dt: exp(-k*dt). k = lin_drag_per_s."""
-        k = max(0.0, float(self.lin_drag_per_s))
-        return math.exp(-k * dt)
+        """Hệ số giảm tốc theo dt ≈ exp(-k*dt), k = lin_drag_per_s.
+
+        Taylor bậc 1 (1 - k*dt) thay transcendental exp; khi k*dt lớn dùng
+        Padé 1/(1 + k*dt) để không âm/không mất ổn định.
+        """
+        k = self.lin_drag_per_s
+        if k <= 0.0:
+            return 1.0
+        key = (k, dt)
+        if key == Ball._damp_key:
+            return Ball._damp_val
+        x = k * dt
+        d = 1.0 - x if x < 0.5 else 1.0 / (1.0 + x)
+        Ball._damp_key = key
+        Ball._damp_val = d
+        return d
 
     def update(
         self,
@@ -66,53 +101,51 @@ class Ball:
         if dt <= 0.0:
             return
 
-        # 1) Cập nhật vị trí (Euler) với vận tốc hiện tại
-        self.x += self.vx * dt
-        self.y += self.vy * dt
-
-        # 2) Giảm tốc không phụ thuộc FPS
-        damp = self._time_invariant_damping(dt)
-        self.vx *= damp
-        self.vy *= damp
-
-        # 3) Kẹp về 0 nếu rất nhỏ
-        min_v2 = self.min_speed * self.min_speed
-        v2 = self.vx * self.vx + self.vy * self.vy
-        if v2 < min_v2:
-            self.vx = 0.0
-            self.vy = 0.0
-
-        # 4) Xử lý biên sân nếu có thông số sân
+        # toàn bộ Euler + giảm tốc + biên nằm trong _ball_step_core (njit nếu có)
         if field_half_w is not None and field_half_h is not None:
             max_x = field_half_w - self.radius
             max_y = field_half_h - self.radius
-
-            if boundary_mode == "clip":
-                # Kẹp vị trí trong sân; nếu chạm biên có thể dừng bóng nhẹ
-                if self.x > max_x:
-                    self.x = max_x; self.vx = 0.0
-                elif self.x < -max_x:
-                    self.x = -max_x; self.vx = 0.0
-                if self.y > max_y:
-                    self.y = max_y; self.vy = 0.0
-                elif self.y < -max_y:
-                    self.y = -max_y; self.vy = 0.0
-
-            elif boundary_mode == "bounce":
-                # Bật lại với hệ số đàn hồi
-                if self.x > max_x:
-                    self.x = max_x
-                    self.vx = -self.vx * self.restitution
-                elif self.x < -max_x:
-                    self.x = -max_x
-                    self.vx = -self.vx * self.restitution
-
-                if self.y > max_y:
-                    self.y = max_y
-                    self.vy = -self.vy * self.restitution
-                elif self.y < -max_y:
-                    self.y = -max_y
-                    self.vy = -self.vy * self.restitution
+            mode = _BOUND_CLIP if boundary_mode == "clip" else _BOUND_BOUNCE
+        else:
+            max_x = max_y = 0.0
+            mode = _BOUND_NONE
+
+        self.x, self.y, self.vx, self.vy = _ball_step_core(
+            self.x, self.y, self.vx, self.vy,
+            dt, self.lin_drag_per_s, self.min_speed,
+            max_x, max_y, mode, self.restitution)
+
+    @staticmethod
+    def make_stepper(
+        dt: float,
+        field_half_w: Optional[float] = 11.0,
+        field_half_h: Optional[float] = 7.0,
+        boundary_mode: BoundaryMode = "clip",
+    ):
+        """Đặc tả hoá update cho (dt, sân, boundary) cố định cả episode.
+
+        Trả về closure step(ball) đã bind sẵn dt/max_x/max_y/mode — vòng sim
+        tần số cao khỏi kiểm tra None và so sánh chuỗi mỗi tick. Lưu ý:
+        max_x/max_y tính theo radius mặc định lúc gọi make_stepper.
+        """
+        if field_half_w is not None and field_half_h is not None:
+            max_x = field_half_w - _DEFAULT_RADIUS
+            max_y = field_half_h - _DEFAULT_RADIUS
+            mode = _BOUND_CLIP if boundary_mode == "clip" else _BOUND_BOUNCE
+        else:
+            max_x = max_y = 0.0
+            mode = _BOUND_NONE
+        core = _ball_step_core  # bind local — tránh tra cứu global mỗi tick
+
+        def step(ball: "Ball") -> None:
+            if dt <= 0.0:
+                return
+            ball.x, ball.y, ball.vx, ball.vy = core(
+                ball.x, ball.y, ball.vx, ball.vy,
+                dt, ball.lin_drag_per_s, ball.min_speed,
+                max_x, max_y, mode, ball.restitution)
+
+        return step
 
     def __repr__(self) -> str:
         return f"Ball(x={self.x:.2f}, y={self.y:.2f}, vx={self.vx:.2f}, vy={self.vy:.2f})"
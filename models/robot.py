@@ -2,16 +2,94 @@
 from __future__ import annotations
 
 import math
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Tuple, List
 
+import numpy as np
+
+try:
+    from numba import njit  # tùy chọn — không có numba vẫn chạy thuần Python
+except ImportError:
+    njit = None
+
+# kernel cone dùng chung (njit nếu có numba) — cùng chỗ với tích phân bóng
+from simulation.physics_core import cone_test as _cone_test
+
+# mẫu đỉnh đơn vị (h = 1) theo CCW — nhân half_side là ra local corners
+_CORNER_TEMPLATE = np.array([(-1.0, -1.0), (1.0, -1.0), (1.0, 1.0), (-1.0, 1.0)])
+
+
 def _wrap_pi(a: float) -> float:
     return (a + math.pi) % (2.0 * math.pi) - math.pi
 
 def _clamp(x: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, x))
 
-@dataclass
+
+def _step_core(x: float, y: float, theta: float,
+               vx: float, vy: float, omega: float,
+               dvx_c: float, dvy_c: float, dw_c: float,
+               tau_v: float, tau_w: float,
+               max_speed: float, max_omega: float,
+               max_accel: float, max_alpha: float,
+               dt: float):
+    """Lõi tích phân động học 1 bước — thuần scalar để numba biên dịch được.
+
+    Trả về (x, y, theta, vx, vy, omega) mới; cùng công thức với Robot.update cũ.
+    Semi-implicit Euler: vận tốc được lọc/kẹp trước, pose tích phân bằng vận
+    tốc MỚI — cho phép dt lớn hơn explicit Euler với cùng sai số.
+    """
+    # bám lệnh bậc 1
+    av = 1.0 - math.exp(-dt / tau_v) if tau_v > 0.0 else 1.0
+    aw = 1.0 - math.exp(-dt / tau_w) if tau_w > 0.0 else 1.0
+    vx_tgt = vx + av * (dvx_c - vx)
+    vy_tgt = vy + av * (dvy_c - vy)
+    w_tgt = omega + aw * (dw_c - omega)
+
+    # kẹp tổng tốc — so sánh bình phương, chỉ sqrt khi thật sự phải rescale
+    sp2 = vx_tgt * vx_tgt + vy_tgt * vy_tgt
+    if max_speed > 0.0 and sp2 > max_speed * max_speed:
+        s = max_speed / math.sqrt(sp2)
+        vx_tgt *= s
+        vy_tgt *= s
+    if w_tgt > max_omega:
+        w_tgt = max_omega
+    elif w_tgt < -max_omega:
+        w_tgt = -max_omega
+
+    # giới hạn gia tốc theo bước dt
+    max_dv = max_accel * dt
+    dvx = vx_tgt - vx
+    dvy = vy_tgt - vy
+    dv2 = dvx * dvx + dvy * dvy
+    if max_dv > 0.0 and dv2 > max_dv * max_dv:
+        s = max_dv / math.sqrt(dv2)
+        dvx *= s
+        dvy *= s
+    vx += dvx
+    vy += dvy
+    dw = w_tgt - omega
+    max_dw = max_alpha * dt
+    if dw > max_dw:
+        dw = max_dw
+    elif dw < -max_dw:
+        dw = -max_dw
+    omega += dw
+
+    # tích phân pose + wrap theta
+    x += vx * dt
+    y += vy * dt
+    theta = (theta + omega * dt + math.pi) % (2.0 * math.pi) - math.pi
+    return x, y, theta, vx, vy, omega
+
+
+if njit is not None:
+    _step_core = njit(
+        "UniTuple(f8, 6)(f8, f8, f8, f8, f8, f8, f8, f8, f8, f8, f8, f8, f8, f8, f8, f8)",
+        cache=True, fastmath=True,
+    )(_step_core)
+
+@dataclass(slots=True)
 class Robot:
     """
     Robot MSL (thuần logic, không UI) — HÌNH VUÔNG, cạnh side_len (m).
@@ -59,6 +137,12 @@ class Robot:
     # --- DEBUG / UI label ---
     dbg_action: str = ""  # <— tên action đang chọn (để TeamGraphic hiển thị)
 
+    # cache sin/cos(theta) — cùng 1 pose thường bị hỏi nhiều lần mỗi tick
+    # (corners/aabb/dribble_anchor/graphics); so sánh theta là đủ invalid hoá
+    _cs_theta: float = field(default=math.nan, init=False, repr=False)
+    _cs_c: float = field(default=1.0, init=False, repr=False)
+    _cs_s: float = field(default=0.0, init=False, repr=False)
+
     # --------- tiện ích ----------
     @property
     def pose(self) -> Tuple[float, float, float]:
@@ -87,12 +171,33 @@ class Robot:
         h = self.half_side
         return math.hypot(h, h)
 
-    def corners(self) -> List[Tuple[float, float]]:
-        """4 đỉnh theo thứ tự CCW, đã quay theo theta, tịnh tiến tới (x,y)."""
+    def _cs(self) -> Tuple[float, float]:
+        """(cos(theta), sin(theta)) có cache — chỉ tính lại khi theta đổi."""
+        th = self.theta
+        if th != self._cs_theta:
+            self._cs_c = math.cos(th)
+            self._cs_s = math.sin(th)
+            self._cs_theta = th
+        return self._cs_c, self._cs_s
+
+    def corners(self) -> np.ndarray:
+        """4 đỉnh (4,2) theo thứ tự CCW, đã quay theo theta, tịnh tiến tới (x,y).
+
+        Trả về ndarray để narrowphase/AABB dùng thẳng min(0)/max(0) và phép
+        chiếu SAT vector hoá, không phải dựng list tuple mỗi lần hỏi.
+        """
         h = self.half_side
-        c, s = math.cos(self.theta), math.sin(self.theta)
-        local = [(-h, -h), (h, -h), (h, h), (-h, h)]
-        return [(self.x + c*lx - s*ly, self.y + s*lx + c*ly) for lx, ly in local]
+        c, s = self._cs()
+        out = _CORNER_TEMPLATE * h          # bản sao (4,2) từ mẫu đơn vị
+        lx = out[:, 0].copy()
+        ly = out[:, 1]
+        out[:, 0] = self.x + c * lx - s * ly
+        out[:, 1] = self.y + s * lx + c * ly
+        return out
+
+    def corners_tuple(self) -> List[Tuple[float, float]]:
+        """Dạng list-tuple tương thích cũ (chậm hơn — chỉ dùng cho debug/in ấn)."""
+        return [(float(px), float(py)) for px, py in self.corners()]
 
     def half_extents_xy(self) -> Tuple[float, float]:
         """
@@ -100,31 +205,36 @@ class Robot:
         Với square: e = h*(|cosθ| + |sinθ|) cho cả Ox và Oy.
         """
         h = self.half_side
-        c, s = abs(math.cos(self.theta)), abs(math.sin(self.theta))
-        e = h * (c + s)
+        c, s = self._cs()
+        e = h * (abs(c) + abs(s))
         return (e, e)
 
     def aabb(self) -> Tuple[float, float, float, float]:
-        xs, ys = zip(*self.corners())
-        return (min(xs), max(xs), min(ys), max(ys))
+        # công thức trực tiếp cho OBB vuông: e = h*(|cosθ|+|sinθ|) —
+        # không cần dựng corners rồi lấy min/max
+        c, s = self._cs()
+        e = self.half_side * (abs(c) + abs(s))
+        return (self.x - e, self.x + e, self.y - e, self.y + e)
 
     # --------- set/command ----------
     def set_pose(self, x: float, y: float, theta: float) -> None:
-        self.x, self.y, self.theta = float(x), float(y), _wrap_pi(float(theta))
+        self.x, self.y, self.theta = x, y, _wrap_pi(theta)
 
     def set_vel(self, vx: float, vy: float, omega: float) -> None:
-        self.vx, self.vy, self.omega = float(vx), float(vy), float(omega)
+        self.vx, self.vy, self.omega = vx, vy, omega
 
     def stop(self) -> None:
         self.desired_vx = self.desired_vy = self.desired_omega = 0.0
 
     def command_velocity(self, vx: float, vy: float, omega: float) -> None:
-        sp = math.hypot(vx, vy)
-        if sp > 1e-9 and sp > self.max_speed:
-            k = self.max_speed / sp
+        sp2 = vx * vx + vy * vy
+        ms = self.max_speed
+        if sp2 > ms * ms and sp2 > 1e-18:
+            k = ms / math.sqrt(sp2)
             vx *= k; vy *= k
-        omega = _clamp(omega, -self.max_omega, self.max_omega)
-        self.desired_vx, self.desired_vy, self.desired_omega = float(vx), float(vy), float(omega)
+        mo = self.max_omega
+        omega = -mo if omega < -mo else (mo if omega > mo else omega)
+        self.desired_vx, self.desired_vy, self.desired_omega = vx, vy, omega
 
     def command_move_towards(self, tx: float, ty: float, speed: float | None = None) -> None:
         if speed is None: speed = self.max_speed
@@ -136,9 +246,12 @@ class Robot:
         self.command_velocity(ux * speed, uy * speed, self.desired_omega)
 
     def command_face_point(self, tx: float, ty: float, kp: float = 3.0, max_rate: float | None = None) -> None:
-        err = _wrap_pi(math.atan2(ty - self.y, tx - self.x) - self.theta)
+        # inline wrap [-pi,pi) + clamp — tránh 3 lời gọi hàm Python mỗi lần
+        err = (math.atan2(ty - self.y, tx - self.x) - self.theta + math.pi) \
+            % (2.0 * math.pi) - math.pi
         w = kp * err
-        self.desired_omega = _clamp(w, - (max_rate or self.max_omega), (max_rate or self.max_omega))
+        lim = max_rate or self.max_omega
+        self.desired_omega = -lim if w < -lim else (lim if w > lim else w)
 
     # --------- cập nhật động học ----------
     def _alpha(self, tau: float, dt: float) -> float:
@@ -147,43 +260,23 @@ class Robot:
 
     def update(self, dt: float) -> None:
         if not self.active or dt <= 0.0: return
-
-        # bám lệnh bậc 1
-        av = self._alpha(self.tau_v, dt)
-        aw = self._alpha(self.tau_w, dt)
-        vx_tgt = self.vx + av * (self.desired_vx - self.vx)
-        vy_tgt = self.vy + av * (self.desired_vy - self.vy)
-        w_tgt  = self.omega + aw * (self.desired_omega - self.omega)
-
-        # kẹp tổng tốc
-        sp = math.hypot(vx_tgt, vy_tgt)
-        if sp > self.max_speed > 0.0:
-            s = self.max_speed / sp
-            vx_tgt *= s; vy_tgt *= s
-        w_tgt = _clamp(w_tgt, -self.max_omega, self.max_omega)
-
-        # giới hạn gia tốc theo bước dt
-        max_dv = self.max_accel * dt
-        dvx, dvy = vx_tgt - self.vx, vy_tgt - self.vy
-        dv = math.hypot(dvx, dvy)
-        if dv > max_dv > 0.0:
-            s = max_dv / dv
-            dvx *= s; dvy *= s
-        self.vx += dvx
-        self.vy += dvy
-        self.omega += _clamp(w_tgt - self.omega, -self.max_alpha * dt, self.max_alpha * dt)
-
-        # tích phân pose
-        self.x += self.vx * dt
-        self.y += self.vy * dt
-        self.theta = _wrap_pi(self.theta + self.omega * dt)
+        # toàn bộ phần tích phân nằm trong _step_core (njit nếu có numba)
+        (self.x, self.y, self.theta,
+         self.vx, self.vy, self.omega) = _step_core(
+            self.x, self.y, self.theta,
+            self.vx, self.vy, self.omega,
+            self.desired_vx, self.desired_vy, self.desired_omega,
+            self.tau_v, self.tau_w,
+            self.max_speed, self.max_omega,
+            self.max_accel, self.max_alpha,
+            dt)
 
     # --------- nhận bóng (cone) & dribble ----------
     def ball_relative(self, bx: float, by: float) -> Tuple[float, float]:
         """Trả về (dist, ang_err) với ang_err = góc(bóng) - heading ∈ [-pi, pi]."""
         dx, dy = bx - self.x, by - self.y
         dist = math.hypot(dx, dy)
-        ang_err = _wrap_pi(math.atan2(dy, dx) - self.theta)
+        ang_err = (math.atan2(dy, dx) - self.theta + math.pi) % (2.0 * math.pi) - math.pi
         return dist, ang_err
 
     def sees_ball_front(self, bx: float, by: float,
@@ -193,23 +286,35 @@ class Robot:
         dist, ang_err = self.ball_relative(bx, by)
         return (dist <= max_dist) and (abs(ang_err) <= math.radians(half_angle_deg))
 
+    def sees_ball_front_cached(self, bx: float, by: float,
+                               max_dist2: float, cos_half: float) -> bool:
+        """Đường nhanh của sees_ball_front: nhận ngưỡng ĐÃ tính sẵn
+        (khoảng cách bình phương + cos nửa góc) — dot-test thay atan2,
+        không đổi đơn vị độ→rad mỗi lần gọi."""
+        dx = bx - self.x
+        dy = by - self.y
+        if dx * dx + dy * dy > max_dist2:
+            return False  # loại sớm trước khi đụng tới trig cache
+        c, s = self._cs()
+        return bool(_cone_test(dx, dy, c, s, max_dist2, cos_half))
+
     def dribble_anchor(self, ball_radius: float = 0.11, gap: float = 0.015) -> Tuple[float, float, float, float]:
         """
         Tính vị trí & vận tốc 'neo' của bóng khi dính ở mũi robot.
         Trả về (ax, ay, avx, avy).
         """
-        h = self.half_side
-        front = h + ball_radius + gap        # từ tâm robot → tâm bóng
-        c, s = math.cos(self.theta), math.sin(self.theta)
+        front = self.half_side + ball_radius + gap   # từ tâm robot → tâm bóng
+        c, s = self._cs()
 
-        # Vị trí neo (trước mũi)
-        ax = self.x + c * front
-        ay = self.y + s * front
+        # vector từ tâm → neo (world) — tính 1 lần, dùng cho cả vị trí lẫn ω×r
+        rx, ry = c * front, s * front
+        ax = self.x + rx
+        ay = self.y + ry
 
         # Vận tốc neo = vận tốc tịnh tiến + thành phần quay (ω × r)
-        rx, ry = c * front, s * front        # vector từ tâm → neo (world)
-        avx = self.vx - self.omega * ry      # ω×r (2D): (-ω*ry, ω*rx)
-        avy = self.vy + self.omega * rx
+        w = self.omega
+        avx = self.vx - w * ry               # ω×r (2D): (-ω*ry, ω*rx)
+        avy = self.vy + w * rx
         return ax, ay, avx, avy
 
     # --------- debug ----------
@@ -5,6 +5,8 @@ import math
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Iterable, Tuple, Literal, TYPE_CHECKING
 
+import numpy as np
+
 from .robot import Robot  # robot thuần logic (hình vuông cạnh 0.45 m mặc định)
 
 if TYPE_CHECKING:
@@ -13,8 +15,58 @@ if TYPE_CHECKING:
 
 Side = Literal["left", "right"]  # "left" = phòng thủ cầu môn x = -11 (tấn công +x)
 
-
-@dataclass
+# bảng mẫu kick-off đã dựng: (n, sign, field_w, field_h, margin_goal) → [(x,y,theta)]
+_KICKOFF_CACHE: Dict[Tuple[int, int, float, float, float],
+                     List[Tuple[float, float, float]]] = {}
+
+
+def _kickoff_templates(n: int, s: int, field_w: float, field_h: float,
+                       margin_goal: float) -> List[Tuple[float, float, float]]:
+    """Mẫu vị trí kick-off (đã clip biên) cho n robot, cache theo tham số sân."""
+    key = (n, s, field_w, field_h, margin_goal)
+    cached = _KICKOFF_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    half_w = field_w * 0.5
+    half_h = field_h * 0.5
+
+    # toạ độ x cơ bản (tính theo hướng tấn công, rồi dịch theo side)
+    x_gk = -s * (half_w - margin_goal)             # gần khung thành nhà
+    x_def = -s * 6.0
+    x_mid = -s * 3.0
+    x_fwd = -s * 1.0
+    y_mid = 2.0
+    y_max = half_h - 0.5
+
+    base: List[Tuple[float, float]] = []
+    if n >= 1:
+        base.append((x_gk, 0.0))
+    if n >= 2:
+        base.append((x_def, 0.0))
+    if n >= 3:
+        base.append((x_mid, +y_mid))
+    if n >= 4:
+        base.append((x_mid, -y_mid))
+    if n >= 5:
+        base.append((x_fwd, 0.0))
+    # nếu >5, rải thêm dọc theo trục y quanh x_mid
+    extra = n - len(base)
+    if extra > 0:
+        step = max(1.0, y_max / (extra + 1))
+        for i in range(extra):
+            base.append((x_mid, (i + 1) * step * (-1 if i % 2 else 1)))
+
+    # góc quay: hướng về khung thành đối phương; clip biên ngay tại đây
+    face_theta = 0.0 if s == 1 else math.pi
+    out = [(max(-half_w + 0.1, min(half_w - 0.1, px)),
+            max(-half_h + 0.1, min(half_h - 0.1, py)),
+            face_theta) for px, py in base]
+    _KICKOFF_CACHE[key] = out
+    return out
+
+
+@dataclass(slots=True)
 class Team:
     """
     Quản lý một đội robot (MSL).
@@ -47,6 +99,36 @@ class Team:
 
     # nội bộ
     _next_robot_id: int = field(default=1, init=False, repr=False)
+    # tăng mỗi lần đội hình đổi (add/remove) — lớp graphics so sánh O(1)
+    # thay vì quét lại roster mỗi frame
+    version: int = field(default=0, init=False, repr=False)
+    # cache SoA cho update(dt) vector hoá — dựng lại khi version đổi
+    _upd_version: int = field(default=-1, init=False, repr=False)
+    _upd_robots: List[Robot] = field(default_factory=list, init=False, repr=False)
+    _upd_params: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    _upd_state: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    # scratch (3,n) cho nearest_robot_to: x, y, active — tái dùng giữa các lần gọi
+    _nr_buf: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    # hình học SoA cho broadphase: half_side (n,) + scratch (3,n) x, y, theta
+    _geom_h: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    _geo_buf: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    # cache robots_list() đã sort theo id — rebuild khi version đổi
+    _list_version: int = field(default=-1, init=False, repr=False)
+    _list_cache: List[Robot] = field(default_factory=list, init=False, repr=False)
+    # memo hệ số bám lệnh 1-exp(-dt/tau) — sim fixed-step nên (dt, roster)
+    # gần như không đổi giữa các tick; tránh 2 np.exp mỗi lần update
+    _alpha_key: Tuple[float, int] = field(default=(-1.0, -1), init=False, repr=False)
+    _alpha_av: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    _alpha_aw: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    # các tích hằng theo tick, cùng khoá memo: max_accel*dt và max_alpha*dt
+    _max_dv: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    _max_dw: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    # dấu tấn công cache 1 lần lúc tạo đội — side không đổi giữa trận,
+    # tránh so sánh chuỗi trong các vòng nóng (positioning/planner)
+    _side_sign: int = field(default=1, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._side_sign = 1 if self.side == "left" else -1
 
     # ------------------------------------------------------------
     # Thuộc tính suy diễn
@@ -54,7 +136,7 @@ class Team:
     @property
     def attack_sign(self) -> int:
         """Hướng tấn công theo trục Ox: +1 nếu đội ở 'left' (tấn công +x), -1 nếu 'right'."""
-        return 1 if self.side == "left" else -1
+        return self._side_sign
 
     @property
     def own_goal_x(self) -> float:
@@ -88,6 +170,7 @@ class Team:
         robot.team_id = self.team_id
         robot.robot_id = robot_id
         self.robots[robot_id] = robot
+        self.version += 1
 
         # nếu chưa có thủ môn, đặt robot đầu tiên làm GK
         if self.goalie_id is None:
@@ -95,7 +178,8 @@ class Team:
         return robot
 
     def remove_robot(self, robot_id: int) -> None:
-        self.robots.pop(robot_id, None)
+        if self.robots.pop(robot_id, None) is not None:
+            self.version += 1
         if self.goalie_id == robot_id:
             self.goalie_id = next(iter(self.robots.keys()), None)
 
@@ -103,7 +187,11 @@ class Team:
         return self.robots.get(robot_id)
 
     def robots_list(self) -> List[Robot]:
-        return [self.robots[rid] for rid in sorted(self.robots.keys())]
+        # cache theo version — sort lại chỉ khi roster đổi, không phải mỗi lần gọi
+        if self._list_version != self.version:
+            self._list_cache = [self.robots[rid] for rid in sorted(self.robots.keys())]
+            self._list_version = self.version
+        return self._list_cache
 
     def active_robots(self) -> Iterable[Robot]:
         return (r for r in self.robots_list() if r.active)
@@ -120,10 +208,106 @@ class Team:
     # ------------------------------------------------------------
     # Cập nhật/tiện ích
     # ------------------------------------------------------------
+    def _refresh_update_cache(self) -> None:
+        """Dựng lại snapshot robot + khối tham số SoA (chỉ khi roster đổi)."""
+        robots = list(self.robots.values())
+        n = len(robots)
+        params = np.empty((6, n), dtype=np.float64)
+        for i, r in enumerate(robots):
+            params[0, i] = r.tau_v
+            params[1, i] = r.tau_w
+            params[2, i] = r.max_speed
+            params[3, i] = r.max_omega
+            params[4, i] = r.max_accel
+            params[5, i] = r.max_alpha
+        self._upd_robots = robots
+        self._upd_params = params
+        self._upd_state = np.empty((10, n), dtype=np.float64)
+        self._nr_buf = np.empty((3, n), dtype=np.float64)
+        self._geom_h = np.array([0.5 * r.side_len for r in robots], dtype=np.float64)
+        self._geo_buf = np.empty((3, n), dtype=np.float64)
+        self._upd_version = self.version
+
     def update(self, dt: float) -> None:
-        """Cập nhật tất cả robot theo thời gian dt."""
-        for r in self.robots.values():
-            r.update(dt)
+        """Cập nhật tất cả robot theo thời gian dt (tích phân vector hoá cả đội).
+
+        Cùng công thức với Robot.update nhưng tính bằng ndarray một lượt:
+        bám lệnh bậc 1 → kẹp tổng tốc → giới hạn gia tốc → tích phân pose.
+        """
+        if dt <= 0.0:
+            return
+        if self._upd_version != self.version:
+            self._refresh_update_cache()
+        robots = self._upd_robots
+        n = len(robots)
+        if n == 0:
+            return
+
+        st = self._upd_state
+        for i, r in enumerate(robots):
+            st[0, i] = r.x
+            st[1, i] = r.y
+            st[2, i] = r.theta
+            st[3, i] = r.vx
+            st[4, i] = r.vy
+            st[5, i] = r.omega
+            st[6, i] = r.desired_vx
+            st[7, i] = r.desired_vy
+            st[8, i] = r.desired_omega
+            st[9, i] = r.active
+        x, y, theta, vx, vy, omega, dvx_c, dvy_c, dw_c, act = st
+        tau_v, tau_w, max_speed, max_omega, max_accel, max_alpha = self._upd_params
+
+        # bám lệnh bậc 1 (tau <= 0 → bám tức thời) + các tích hằng theo tick —
+        # memo chung theo (dt, roster)
+        key = (dt, self.version)
+        if key != self._alpha_key:
+            self._alpha_av = np.where(
+                tau_v > 0.0, 1.0 - np.exp(-dt / np.maximum(tau_v, 1e-12)), 1.0)
+            self._alpha_aw = np.where(
+                tau_w > 0.0, 1.0 - np.exp(-dt / np.maximum(tau_w, 1e-12)), 1.0)
+            self._max_dv = max_accel * dt
+            self._max_dw = max_alpha * dt
+            self._alpha_key = key
+        av = self._alpha_av
+        aw = self._alpha_aw
+        vx_tgt = vx + av * (dvx_c - vx)
+        vy_tgt = vy + av * (dvy_c - vy)
+        w_tgt = omega + aw * (dw_c - omega)
+
+        # kẹp tổng tốc
+        sp = np.hypot(vx_tgt, vy_tgt)
+        scale = np.where((sp > max_speed) & (max_speed > 0.0),
+                         max_speed / np.maximum(sp, 1e-12), 1.0)
+        vx_tgt *= scale
+        vy_tgt *= scale
+        w_tgt = np.clip(w_tgt, -max_omega, max_omega)
+
+        # giới hạn gia tốc theo bước dt (tích hằng đã memo ở trên)
+        max_dv = self._max_dv
+        max_dw = self._max_dw
+        dvx = vx_tgt - vx
+        dvy = vy_tgt - vy
+        dv = np.hypot(dvx, dvy)
+        s = np.where((dv > max_dv) & (max_dv > 0.0), max_dv / np.maximum(dv, 1e-12), 1.0)
+        vx_new = vx + dvx * s
+        vy_new = vy + dvy * s
+        omega_new = omega + np.clip(w_tgt - omega, -max_dw, max_dw)
+
+        # tích phân pose + wrap theta về [-pi, pi)
+        x_new = x + vx_new * dt
+        y_new = y + vy_new * dt
+        theta_new = (theta + omega_new * dt + math.pi) % (2.0 * math.pi) - math.pi
+
+        for i, r in enumerate(robots):
+            if not act[i]:
+                continue  # robot inactive giữ nguyên trạng thái (giống Robot.update)
+            r.x = x_new[i]
+            r.y = y_new[i]
+            r.theta = theta_new[i]
+            r.vx = vx_new[i]
+            r.vy = vy_new[i]
+            r.omega = omega_new[i]
 
     def center_of_mass(self) -> Tuple[float, float]:
         """Tâm hình học của các robot (trung bình vị trí)."""
@@ -136,20 +320,69 @@ class Team:
         return (sx / n, sy / n)
 
     def nearest_robot_to(self, x: float, y: float, *, active_only: bool = True) -> Optional[Robot]:
-        """Trả về robot gần (x,y) nhất."""
-        best: Optional[Robot] = None
-        best_d2 = float("inf")
-        for r in (self.active_robots() if active_only else self.robots_list()):
-            dx, dy = r.x - x, r.y - y
-            d2 = dx * dx + dy * dy
-            if d2 < best_d2:
-                best_d2 = d2
-                best = r
-        return best
+        """Trả về robot gần (x,y) nhất (argmin vector hoá trên khoảng cách bình phương)."""
+        if self._upd_version != self.version:
+            self._refresh_update_cache()
+        robots = self._upd_robots
+        if not robots:
+            return None
+
+        buf = self._nr_buf
+        for i, r in enumerate(robots):
+            buf[0, i] = r.x
+            buf[1, i] = r.y
+            buf[2, i] = r.active
+        px, py, act = buf
+        d2 = (px - x) ** 2 + (py - y) ** 2
+        if active_only:
+            d2[act == 0.0] = np.inf
+        idx = int(np.argmin(d2))
+        if d2[idx] == np.inf:
+            return None  # không robot nào active
+        return robots[idx]
 
     def nearest_to_ball(self, ball: Ball, *, active_only: bool = True) -> Optional[Robot]:
         return self.nearest_robot_to(ball.x, ball.y, active_only=active_only)
 
+    # ------------------------------------------------------------
+    # Hình học cả đội (broadphase/SAT vector hoá)
+    # ------------------------------------------------------------
+    def _gather_pose(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Gom x, y, theta của cả đội vào scratch SoA; trả về 3 view (n,)."""
+        if self._upd_version != self.version:
+            self._refresh_update_cache()
+        buf = self._geo_buf
+        for i, r in enumerate(self._upd_robots):
+            buf[0, i] = r.x
+            buf[1, i] = r.y
+            buf[2, i] = r.theta
+        return buf[0], buf[1], buf[2]
+
+    def aabbs(self) -> np.ndarray:
+        """(n,4) AABB của mọi robot, cột (min_x, max_x, min_y, max_y).
+
+        Với robot vuông nửa cạnh h: e = h*(|cosθ|+|sinθ|) trên cả hai trục —
+        một biểu thức numpy thay n lần Robot.aabb(), thứ tự theo robots.values().
+        """
+        x, y, theta = self._gather_pose()
+        c = np.cos(theta)
+        s = np.sin(theta)
+        e = self._geom_h * (np.abs(c) + np.abs(s))
+        out = np.empty((len(x), 4), dtype=np.float64)
+        out[:, 0] = x - e
+        out[:, 1] = x + e
+        out[:, 2] = y - e
+        out[:, 3] = y + e
+        return out
+
+    def obb_axes(self) -> np.ndarray:
+        """(n,2,2) trục OBB đơn vị của mọi robot: hàng 0 = (cosθ, sinθ),
+        hàng 1 = (-sinθ, cosθ) — dùng thẳng cho phép chiếu SAT theo lô."""
+        _, _, theta = self._gather_pose()
+        c = np.cos(theta)
+        s = np.sin(theta)
+        return np.stack([np.stack([c, s], -1), np.stack([-s, c], -1)], axis=1)
+
     # ------------------------------------------------------------
     # Đội hình & auto-position
     # ------------------------------------------------------------
@@ -181,35 +414,13 @@ class Team:
         - 1 tiền đạo
         Hướng quay mặt về phía tấn công.
         """
-        half_w = field_w * 0.5
-        half_h = field_h * 0.5
         s = self.attack_sign  # +1 (tấn công +x) hoặc -1
 
-        # toạ độ x cơ bản (tính theo hướng tấn công, rồi dịch theo side)
-        x_gk = -s * (half_w - margin_goal)             # gần khung thành nhà
-        x_def = -s * 6.0
-        x_mid = -s * 3.0
-        x_fwd = -s * 1.0
-
-        # toạ độ y
-        y0 = 0.0
-        y_mid = 2.0
-        y_max = half_h - 0.5
-
-        # đảm bảo không vượt biên
-        def clip_xy(x: float, y: float) -> Tuple[float, float]:
-            x = max(-half_w + 0.1, min(half_w - 0.1, x))
-            y = max(-half_h + 0.1, min(half_h - 0.1, y))
-            return (x, y)
-
-        # góc quay: hướng về khung thành đối phương
-        face_theta = 0.0 if s == 1 else math.pi
-
         # danh sách robot theo thứ tự: GK, DF, MF1, MF2, FW (cắt bớt nếu thiếu)
-        order = self.robots_list()
+        order = list(self.robots_list())  # copy — sort bên dưới không được đụng cache
         if not order:
             self.ensure_size(self.max_size)
-            order = self.robots_list()
+            order = list(self.robots_list())
 
         # Bảo đảm GK ở vị trí đầu tiên trong order (nếu có goalie_id)
         if self.goalie_id is not None:
@@ -218,29 +429,12 @@ class Team:
             # đặt robot đầu tiên làm GK nếu chưa có
             self.goalie_id = order[0].robot_id
 
-        # tạo mẫu vị trí theo số robot hiện có
-        templates: List[Tuple[float, float]] = []
-        n = len(order)
-        if n >= 1:
-            templates.append((x_gk, y0))
-        if n >= 2:
-            templates.append((x_def, y0))
-        if n >= 3:
-            templates.append((x_mid, +y_mid))
-        if n >= 4:
-            templates.append((x_mid, -y_mid))
-        if n >= 5:
-            templates.append((x_fwd, 0.0))
-        # nếu >5, rải thêm dọc theo trục y quanh x_mid
-        extra = n - len(templates)
-        if extra > 0:
-            step = max(1.0, y_max / (extra + 1))
-            for i in range(extra):
-                templates.append((x_mid, (i + 1) * step * (-1 if i % 2 else 1)))
+        # bảng mẫu (px, py, theta) tính sẵn 1 lần cho mỗi (n, side, sân) —
+        # reset kick-off lặp lại (nhất là khi training) chỉ còn tra bảng
+        templates = _kickoff_templates(len(order), s, field_w, field_h, margin_goal)
 
         # đặt pose cho từng robot
-        for r, (px, py) in zip(order, templates):
-            px, py = clip_xy(px, py)
+        for r, (px, py, face_theta) in zip(order, templates):
             r.set_pose(px, py, face_theta)
             r.set_vel(0.0, 0.0, 0.0)
             r.stop()
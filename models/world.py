@@ -1,12 +1,22 @@
 # models/world.py
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass, field
 from typing import Optional, Tuple, List, Literal, Iterable
 
+import numpy as np
+
 from .ball import Ball
 from .team import Team
 
+# bind 1 lần lúc import — tránh chạy machinery import trong vòng update;
+# None nếu module chưa có (giữ hành vi bỏ qua như trước)
+try:
+    from simulation.collisions import enforce_no_overlap as _enforce_no_overlap
+except Exception:
+    _enforce_no_overlap = None
+
 GameState = Literal["stopped", "playing", "kickoff_left", "kickoff_right", "goal", "halt"]
 
 
@@ -59,6 +69,38 @@ class World:
     # Cooldown sau khi sút/chuyền: trong thời gian này không ai được bắt bóng lại
     kick_cooldown: float = 0.0          # giây
 
+    # cache SoA cho quét possession — dựng lại khi roster 2 đội đổi (version)
+    _poss_versions: Tuple[int, int] = field(default=(-1, -1), init=False, repr=False)
+    _poss_robots: List = field(default_factory=list, init=False, repr=False)
+    _poss_buf: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    # cache list all_robots() — gating cùng kiểu version, khỏi dựng generator/frame
+    _all_versions: Tuple[int, int] = field(default=(-1, -1), init=False, repr=False)
+    _all_cache: List = field(default_factory=list, init=False, repr=False)
+    # cache bán kính bao ngoài (outer_radius) theo thứ tự all_robots() —
+    # side_len bất biến nên chỉ dựng lại khi roster đổi
+    _radii_versions: Tuple[int, int] = field(default=(-1, -1), init=False, repr=False)
+    _radii_np: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    # scratch (5, n, 2) cho bộ giải chồng lấn: pos/vel/ext/clamp_lo/clamp_hi —
+    # cấp phát 1 lần theo roster thay vì np.empty mỗi frame
+    _ovl_versions: Tuple[int, int] = field(default=(-1, -1), init=False, repr=False)
+    _ovl_buf: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    # ngưỡng cone tính sẵn (bình phương khoảng cách + cos nửa góc) — tính 1
+    # lần lúc tạo world; nếu đổi cone_* lúc chạy, gọi lại _refresh_cone_cache()
+    _dist2_on: float = field(default=0.0, init=False, repr=False)
+    _dist2_off: float = field(default=0.0, init=False, repr=False)
+    _cos_on: float = field(default=1.0, init=False, repr=False)
+    _cos_off: float = field(default=1.0, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._refresh_cone_cache()
+
+    def _refresh_cone_cache(self) -> None:
+        """Tính lại ngưỡng cone từ cấu hình cone_* hiện tại."""
+        self._dist2_on = self.cone_dist_on * self.cone_dist_on
+        self._dist2_off = self.cone_dist_off * self.cone_dist_off
+        self._cos_on = math.cos(math.radians(self.cone_angle_on_deg))
+        self._cos_off = math.cos(math.radians(self.cone_angle_off_deg))
+
     # ------------------------------------------------------------
     # Thuộc tính tiện ích
     # ------------------------------------------------------------
@@ -73,9 +115,35 @@ class World:
     def teams(self) -> List[Team]:
         return [self.team_left, self.team_right]
 
-    def all_robots(self) -> Iterable:
-        for tm in self.teams():
-            yield from tm.robots.values()
+    def all_robots(self) -> List:
+        # list cache theo version 2 đội — roster hiếm khi đổi nên gần như
+        # luôn trả thẳng list cũ thay vì tạo generator + 2 dict view mỗi lần
+        versions = (self.team_left.version, self.team_right.version)
+        if versions != self._all_versions:
+            self._all_cache = list(self.team_left.robots.values()) \
+                + list(self.team_right.robots.values())
+            self._all_versions = versions
+        return self._all_cache
+
+    def collision_radii(self) -> np.ndarray:
+        # outer_radius từng robot (thứ tự all_robots()) — chỉ phụ thuộc
+        # side_len nên cache theo version roster, khỏi hypot lại mỗi frame
+        versions = (self.team_left.version, self.team_right.version)
+        if versions != self._radii_versions or self._radii_np is None:
+            self._radii_np = np.array(
+                [r.outer_radius for r in self.all_robots()], dtype=np.float64)
+            self._radii_versions = versions
+        return self._radii_np
+
+    def collision_scratch(self) -> np.ndarray:
+        # buffer dùng lại giữa các frame cho enforce_no_overlap — gating theo
+        # version roster như _all_cache; caller cắt lát [:, :n_active, :]
+        versions = (self.team_left.version, self.team_right.version)
+        if versions != self._ovl_versions or self._ovl_buf is None:
+            self._ovl_buf = np.empty(
+                (5, len(self.all_robots()), 2), dtype=np.float64)
+            self._ovl_versions = versions
+        return self._ovl_buf
 
     # ------------------------------------------------------------
     # Khởi tạo & bố trí
@@ -139,12 +207,9 @@ class World:
         self.team_left.update(dt)
         self.team_right.update(dt)
 
-        # 2) Chống chồng lấn (lazy import để tránh vòng import)
-        try:
-            from simulation.collisions import enforce_no_overlap  # type: ignore
-            enforce_no_overlap(self, iterations=6, clearance=0.01, restitution=0.0)
-        except Exception:
-            pass  # nếu module chưa có hoặc lỗi, bỏ qua
+        # 2) Chống chồng lấn (đã bind module-level)
+        if _enforce_no_overlap is not None:
+            _enforce_no_overlap(self, iterations=6, clearance=0.01, restitution=0.0)
 
         # 3) Quyền giữ + neo bóng (trước khi ball.update)
         self._update_possession_and_anchor(dt)
@@ -172,49 +237,52 @@ class World:
 
         # Trong thời gian cooldown: không ai giữ bóng
         if self.kick_cooldown > 0.0:
-            for tm in self.teams():
-                for r in tm.robots.values():
-                    r.has_ball = False
+            for r in self.all_robots():
+                r.has_ball = False
             return
 
-        # 1) Giữ người đang có bóng nếu vẫn trong ngưỡng 'off'
+        # snapshot roster + buffer SoA (gating theo version 2 đội)
+        versions = (self.team_left.version, self.team_right.version)
+        if versions != self._poss_versions:
+            self._poss_robots = self.all_robots()
+            self._poss_buf = np.empty((5, len(self._poss_robots)), dtype=np.float64)
+            self._poss_versions = versions
+        robots = self._poss_robots
+
+        # 1) Giữ người đang có bóng nếu vẫn trong ngưỡng 'off' (ngưỡng tính sẵn)
         holder = None
-        for tm in self.teams():
-            for r in tm.robots.values():
-                if r.has_ball and r.sees_ball_front(
-                    bx, by,
-                    max_dist=self.cone_dist_off,
-                    half_angle_deg=self.cone_angle_off_deg
-                ):
-                    holder = r
-                    break
-            if holder:
+        for r in robots:
+            if r.has_ball and r.sees_ball_front_cached(
+                bx, by, self._dist2_off, self._cos_off
+            ):
+                holder = r
                 break
 
-        # 2) Nếu chưa có ai giữ, chọn người trong ngưỡng 'on' gần bóng nhất
-        if holder is None:
-            best_r = None
-            best_d2 = float("inf")
-            for tm in self.teams():
-                for r in tm.robots.values():
-                    if not r.active:
-                        continue
-                    if not r.sees_ball_front(
-                        bx, by,
-                        max_dist=self.cone_dist_on,
-                        half_angle_deg=self.cone_angle_on_deg
-                    ):
-                        continue
-                    d2 = (r.x - bx) ** 2 + (r.y - by) ** 2
-                    if d2 < best_d2:
-                        best_d2 = d2
-                        best_r = r
-            holder = best_r
+        # 2) Nếu chưa có ai giữ: quét cone 'on' vector hoá + argmin khoảng cách
+        if holder is None and robots:
+            buf = self._poss_buf
+            for i, r in enumerate(robots):
+                c, s = r._cs()
+                buf[0, i] = r.x
+                buf[1, i] = r.y
+                buf[2, i] = c
+                buf[3, i] = s
+                buf[4, i] = r.active
+            rx, ry, rc, rs, act = buf
+            dx = bx - rx
+            dy = by - ry
+            d2 = dx * dx + dy * dy
+            d = np.sqrt(d2)
+            # cùng điều kiện sees_ball_front: trong tầm + trong cone (dot-test)
+            mask = (act != 0.0) \
+                & (d2 <= self._dist2_on) \
+                & (dx * rc + dy * rs >= self._cos_on * d)
+            if mask.any():
+                holder = robots[int(np.where(mask, d2, np.inf).argmin())]
 
         # 3) Cập nhật cờ has_ball
-        for tm in self.teams():
-            for r in tm.robots.values():
-                r.has_ball = (r is holder)
+        for r in robots:
+            r.has_ball = (r is holder)
 
         # 4) Dính bóng nếu có holder
         if self.sticky_enabled and (holder is not None):
@@ -1,5 +1,6 @@
 from __future__ import annotations
 import os, sys, math
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple, List
 
 # ---------- Qt ----------
@@ -16,6 +17,9 @@ from controllers.strategy_planner_full import StrategyPlannerFull
 from graphics.scene_manager import SceneManager  # wraps FieldDrawer + TeamGraphic + BallItem
 
 DT = 0.050  # 50 ms
+VIEW_MS = 33  # nhịp vẽ (~30 FPS) — độc lập với nhịp vật lý
+PHYS_HZ = 100   # tần số sub-step vật lý (dt con = 1/PHYS_HZ)
+SIM_SPEED = 1.0  # tỉ lệ thời-gian-mô-phỏng / wallclock (--rate để đổi)
 
 # --- small helpers for "glue" ball when controlled ---
 BALL_R = 0.11
@@ -29,29 +33,33 @@ def _wrap(a: float) -> float:
 def _ang(ax, ay, bx, by) -> float:
     return math.atan2(by - ay, bx - ax)
 
+# cos nửa góc cone — so tích vô hướng thay cho atan2 + wrap mỗi robot mỗi tick
+_CONE_COS = math.cos(math.radians(CONE_HALF_DEG))
+_CATCH_DIST2 = CATCH_DIST * CATCH_DIST  # so khoảng cách bình phương, khỏi sqrt
+
 def attach_ball(world: World, r: Robot) -> None:
-    d = r.half_side + BALL_R - GLUE_EPS
-    c, s = math.cos(r.theta), math.sin(r.theta)
-    world.ball.set_pos(r.x + d * c, r.y + d * s)
-    world.ball.set_vel(r.vx, r.vy)
+    world.ball.attach_to(r, r.half_side + BALL_R - GLUE_EPS)
 
 def try_auto_catch(world: World) -> Optional[Tuple[str, int]]:
     bx, by = world.ball.x, world.ball.y
     for side, tm in (("left", world.team_left), ("right", world.team_right)):
-        for rid, r in tm.robots.items():
+        for r in tm.robots_list():  # list cache theo version — khỏi dict view
             if not r.active: continue
-            d = math.hypot(bx - r.x, by - r.y)
-            if d > CATCH_DIST: continue
-            ang = _ang(r.x, r.y, bx, by)
-            if abs(_wrap(ang - r.theta)) <= math.radians(CONE_HALF_DEG):
+            dx = bx - r.x
+            dy = by - r.y
+            d2 = dx * dx + dy * dy
+            if d2 > _CATCH_DIST2: continue  # loại sớm
+            # bóng trong cone ±CONE_HALF_DEG ⇔ dot(heading, hướng bóng) ≥ cos·|d|
+            c, s = r._cs()
+            if dx * c + dy * s >= _CONE_COS * math.sqrt(d2):
                 r.has_ball = True
                 attach_ball(world, r)
-                return (side, rid)
+                return (side, r.robot_id)
     return None
 
 def get_holder(team) -> Optional[int]:
-    for rid, r in team.robots.items():
-        if r.active and r.has_ball: return rid
+    for r in team.robots_list():
+        if r.active and r.has_ball: return r.robot_id
     return None
 
 # --- initial layout: Blue defend (left), Red attack (right) ---
@@ -86,7 +94,17 @@ def find_graphics_view(ui_root) -> QGraphicsView:
     return views[0]
 
 def main():
-    app = QApplication(sys.argv)
+    import argparse
+    parser = argparse.ArgumentParser(description="MSL sim interface")
+    parser.add_argument("--rate", type=float, default=SIM_SPEED,
+                        help="tốc độ mô phỏng so với wallclock (vd 2.0 = nhanh gấp đôi)")
+    parser.add_argument("--phys-hz", type=float, default=PHYS_HZ,
+                        help="tần số sub-step vật lý (Hz)")
+    args, qt_argv = parser.parse_known_args()
+    sim_speed = max(1e-3, args.rate)
+    phys_hz = max(1.0, args.phys_hz)
+
+    app = QApplication(sys.argv[:1] + qt_argv)
 
     # 1) Load UI
     ui_path = os.path.join(os.path.dirname(__file__), "ui/Interface.ui")
@@ -104,10 +122,26 @@ def main():
     sm = SceneManager(world)  # tạo sẵn scene và các items  :contentReference[oaicite:1]{index=1}
     view.setScene(sm.scene)
 
-    # 4) Timer tick: chiến thuật → vật lý → sync đồ hoạ
-    def tick():
-        red_planner.decide(world)
-        blue_planner.decide(world)
+    # 4) Hai timer tách biệt: vật lý chạy đúng nhịp DT, vẽ chạy nhịp riêng —
+    #    paint stall không còn kéo trễ bước vật lý (cùng event loop Qt nên
+    #    không cần khoá; view chỉ đọc snapshot world giữa 2 tick vật lý)
+    # sub-stepping: mỗi tick timer mô phỏng DT*sim_speed giây, chia thành
+    # các bước con ~1/phys_hz để enforce_no_overlap/integrator không phải
+    # nuốt dt lớn khi chạy nhanh hơn realtime
+    sim_dt = DT * sim_speed
+    n_sub = max(1, round(sim_dt * phys_hz))
+    sub_dt = sim_dt / n_sub
+
+    # hai planner chạy song song trên worker pool rồi join trước bước vật lý —
+    # mỗi planner chỉ ra lệnh cho robot đội mình nên không giẫm chân nhau;
+    # join ngay trong tick giữ nguyên thứ tự decide → glue → update mỗi frame
+    planner_pool = ThreadPoolExecutor(max_workers=2)
+
+    def tick_physics():
+        fut_red = planner_pool.submit(red_planner.decide, world)
+        fut_blue = planner_pool.submit(blue_planner.decide, world)
+        fut_red.result()
+        fut_blue.result()
 
         # giữ dính bóng hoặc bắt bóng lại nếu tự do
         red_holder  = get_holder(world.team_right)
@@ -119,12 +153,20 @@ def main():
         else:
             try_auto_catch(world)
 
-        world.update(DT)
-        sm.sync()  # gọi TeamGraphic.sync() + BallItem.sync(vx,vy) bên trong  
+        for _ in range(n_sub):
+            world.update(sub_dt)
+
+    def tick_view():
+        sm.sync()  # gọi TeamGraphic.sync() + BallItem.sync(vx,vy) bên trong
+
+    timer_phys = QTimer(win)
+    timer_phys.setTimerType(Qt.PreciseTimer)
+    timer_phys.timeout.connect(tick_physics)
+    timer_phys.start(int(DT * 1000))
 
-    timer = QTimer(win)
-    timer.timeout.connect(tick)
-    timer.start(int(DT * 1000))
+    timer_view = QTimer(win)
+    timer_view.timeout.connect(tick_view)
+    timer_view.start(VIEW_MS)
 
     win.show()
     sys.exit(app.exec_())
@@ -3,6 +3,13 @@ from __future__ import annotations
 import math, random
 from typing import List, TYPE_CHECKING
 
+import numpy as np
+
+try:
+    from numba import njit  # tùy chọn — không có numba vẫn chạy thuần Python
+except ImportError:
+    njit = None
+
 # Chỉ import type khi check kiểu, KHÔNG import ở runtime
 if TYPE_CHECKING:
     from models.world import World
@@ -16,6 +23,104 @@ def clamp_robot_inside_field(world: 'World', r: 'Robot') -> None:
     r.x = _clamp(r.x, -world.half_w + ex, world.half_w - ex)
     r.y = _clamp(r.y, -world.half_h + ey, world.half_h - ey)
 
+def _resolve_seq_core(pos, vel, rad, iterations, limit_push, restitution,
+                      clamp_lo, clamp_hi):
+    """Giải chồng lấn tuần tự (Gauss-Seidel) trên mảng in-place — vòng lặp
+    scalar thuần để numba biên dịch; cặp trùng tâm tách theo trục Ox."""
+    n = pos.shape[0]
+    for _ in range(iterations):
+        changed = False
+        for i in range(n):
+            for j in range(i + 1, n):
+                dx = pos[j, 0] - pos[i, 0]
+                dy = pos[j, 1] - pos[i, 1]
+                d2 = dx * dx + dy * dy
+                min_d = rad[i] + rad[j]
+                if d2 >= min_d * min_d:
+                    continue
+                d = math.sqrt(d2)
+                if d > 1e-9:
+                    nx = dx / d
+                    ny = dy / d
+                else:
+                    nx = 1.0
+                    ny = 0.0
+                changed = True
+                push = min(0.5 * (min_d - d), limit_push)
+                pos[i, 0] -= nx * push; pos[i, 1] -= ny * push
+                pos[j, 0] += nx * push; pos[j, 1] += ny * push
+
+                rvx = vel[j, 0] - vel[i, 0]
+                rvy = vel[j, 1] - vel[i, 1]
+                vn = rvx * nx + rvy * ny
+                if vn < 0.0:
+                    imp = -(1.0 + restitution) * vn * 0.5
+                    vel[i, 0] -= nx * imp; vel[i, 1] -= ny * imp
+                    vel[j, 0] += nx * imp; vel[j, 1] += ny * imp
+        for i in range(n):
+            pos[i, 0] = min(max(pos[i, 0], clamp_lo[i, 0]), clamp_hi[i, 0])
+            pos[i, 1] = min(max(pos[i, 1], clamp_lo[i, 1]), clamp_hi[i, 1])
+        if not changed:
+            break  # hội tụ sớm — frame thường không có chồng lấn nào
+
+
+# kernel biên dịch sẵn nếu có numba; None → fallback numpy trong enforce_no_overlap
+_resolve_seq = None
+if njit is not None:
+    _resolve_seq = njit(
+        "void(f8[:, :], f8[:, :], f8[:], i8, f8, f8, f8[:, :], f8[:, :])",
+        cache=True, fastmath=True,
+    )(_resolve_seq_core)
+
+
+# từ cỡ đội này trở lên, lưới băm không gian rẻ hơn ma trận cặp đầy đủ
+_GRID_MIN_N = 12
+
+# các ô lân cận cần xét (nửa mặt phẳng — mỗi cặp ô chỉ gặp nhau 1 lần)
+_NEIGHBOR_CELLS = ((0, 0), (1, 0), (0, 1), (1, 1), (1, -1))
+
+
+def _grid_candidate_pairs(pos: np.ndarray, cell: float):
+    """Broadphase lưới băm đều: trả về (i, j) các cặp ứng viên với i < j.
+
+    Ô cạnh `cell` ≈ 2*max_radius nên mọi cặp chạm nhau nằm cùng ô hoặc ô kề;
+    chỉ xét ô mình + 4 ô nửa mặt phẳng để khỏi sinh cặp trùng. Gần tuyến tính
+    theo n khi đội hình thưa, thay cho n²/2 cặp của ma trận đầy đủ.
+    """
+    inv = 1.0 / cell
+    grid: dict = {}
+    keys = []
+    for idx in range(pos.shape[0]):
+        key = (int(pos[idx, 0] * inv), int(pos[idx, 1] * inv))
+        keys.append(key)
+        grid.setdefault(key, []).append(idx)
+
+    out_i: List[int] = []
+    out_j: List[int] = []
+    for idx in range(pos.shape[0]):
+        cx, cy = keys[idx]
+        for ox, oy in _NEIGHBOR_CELLS:
+            bucket = grid.get((cx + ox, cy + oy))
+            if bucket is None:
+                continue
+            for other in bucket:
+                if ox == 0 and oy == 0:
+                    if other <= idx:
+                        continue  # cùng ô: chỉ lấy i < j
+                    out_i.append(idx)
+                    out_j.append(other)
+                else:
+                    # ô khác: cặp đã duy nhất theo hướng nửa mặt phẳng
+                    if other < idx:
+                        out_i.append(other)
+                        out_j.append(idx)
+                    else:
+                        out_i.append(idx)
+                        out_j.append(other)
+    return (np.asarray(out_i, dtype=np.intp),
+            np.asarray(out_j, dtype=np.intp))
+
+
 def enforce_no_overlap(
     world: 'World',
     *,
@@ -24,58 +129,118 @@ def enforce_no_overlap(
     restitution: float = 0.0,
     limit_push_per_iter: float = 0.10,
 ) -> None:
-    robots: List['Robot'] = [r for r in world.all_robots() if r.active]
+    """Đẩy các robot chồng lấn tách nhau (vector hoá SoA, kiểu Jacobi).
+
+    Gom x/y/vx/vy/bán kính vào ndarray MỘT lần, mỗi vòng lặp tính toàn bộ
+    cặp chồng lấn bằng broadcasting rồi cộng dồn hiệu chỉnh với np.add.at —
+    thay ~n²/2 vòng Python bằng vài phép numpy; ghi ngược về robot 1 lần.
+    """
+    all_robots = world.all_robots()
+    act_idx = [k for k, r in enumerate(all_robots) if r.active]
+    robots: List['Robot'] = [all_robots[k] for k in act_idx]
     n = len(robots)
     if n <= 1:
         for r in robots:
             clamp_robot_inside_field(world, r)
         return
 
-    radii = [r.outer_radius + clearance * 0.5 for r in robots]
+    # bán kính bao ngoài lấy từ cache theo version roster trên World —
+    # hypot chỉ chạy lại khi đội hình đổi, cộng clearance là 1 phép vector
+    rad = world.collision_radii()[np.asarray(act_idx, dtype=np.intp)] \
+        + clearance * 0.5
 
-    for _ in range(max(1, iterations)):
-        order = list(range(n))
-        random.shuffle(order)
+    # --- gather SoA vào scratch cấp phát sẵn trên World (1 lần/call; theta
+    # không đổi trong lúc giải nên half extents kẹp biên cũng gather luôn) ---
+    buf = world.collision_scratch()
+    pos = buf[0, :n]
+    vel = buf[1, :n]
+    ext = buf[2, :n]
+    clamp_lo = buf[3, :n]
+    clamp_hi = buf[4, :n]
+    for idx, r in enumerate(robots):
+        pos[idx, 0] = r.x
+        pos[idx, 1] = r.y
+        vel[idx, 0] = r.vx
+        vel[idx, 1] = r.vy
+        ex, ey = r.half_extents_xy()
+        ext[idx, 0] = ex
+        ext[idx, 1] = ey
 
-        for a in range(n):
-            i = order[a]
-            ri = robots[i]
-            xi, yi = ri.x, ri.y
+    np.add(ext, (-world.half_w, -world.half_h), out=clamp_lo)
+    np.subtract((world.half_w, world.half_h), ext, out=clamp_hi)
+    iters = max(1, iterations)
 
-            for j in range(i + 1, n):
-                rj = robots[j]
-                dx = rj.x - xi
-                dy = rj.y - yi
-                d2 = dx*dx + dy*dy
-                min_d = radii[i] + radii[j]
-
-                if d2 < 1e-12:
-                    ang = random.random() * 2.0 * math.pi
-                    eps = 1e-3
-                    ri.x -= eps*math.cos(ang); ri.y -= eps*math.sin(ang)
-                    rj.x += eps*math.cos(ang); rj.y += eps*math.sin(ang)
-                    dx = rj.x - ri.x; dy = rj.y - ri.y
-                    d2 = dx*dx + dy*dy
+    if _resolve_seq is not None:
+        # đường numba: kernel tuần tự in-place, không còn dispatch Python
+        _resolve_seq(pos, vel, rad, iters, limit_push_per_iter,
+                     restitution, clamp_lo, clamp_hi)
+        for idx, r in enumerate(robots):
+            r.x = pos[idx, 0]
+            r.y = pos[idx, 1]
+            r.vx = vel[idx, 0]
+            r.vy = vel[idx, 1]
+        return
 
-                d = math.sqrt(d2)
-                if d >= min_d:
-                    continue
+    use_grid = n >= _GRID_MIN_N
+    if use_grid:
+        cell = 2.0 * float(rad.max())  # mọi cặp chạm nhau cách < cell
+    else:
+        dense_min_d = rad[:, None] + rad[None, :]
+        upper = np.triu(np.ones((n, n), dtype=bool), 1)  # mỗi cặp xét 1 lần
 
-                nx = dx / d if d > 1e-9 else 1.0
-                ny = dy / d if d > 1e-9 else 0.0
-                overlap = (min_d - d)
+    for _ in range(iters):
+        if use_grid:
+            # broadphase lưới: chỉ các cặp cùng/kề ô (dựng lại mỗi vòng —
+            # vị trí vừa thay đổi)
+            i, j = _grid_candidate_pairs(pos, cell)
+            dxy = pos[j] - pos[i]
+            d2 = dxy[:, 0] ** 2 + dxy[:, 1] ** 2
+            min_d = rad[i] + rad[j]
+            keep = d2 < min_d * min_d
+            i = i[keep]; j = j[keep]
+            dxy = dxy[keep]; d2 = d2[keep]; min_d = min_d[keep]
+        else:
+            diff = pos[None, :, :] - pos[:, None, :]      # (n,n,2): j - i
+            full_d2 = diff[:, :, 0] ** 2 + diff[:, :, 1] ** 2
+            i, j = np.where((full_d2 < dense_min_d * dense_min_d) & upper)
+            dxy = diff[i, j]
+            d2 = full_d2[i, j]
+            min_d = dense_min_d[i, j]
 
-                push = min(0.5 * overlap, limit_push_per_iter)
-                ri.x -= nx * push; ri.y -= ny * push
-                rj.x += nx * push; rj.y += ny * push
+        if i.size == 0:
+            # không còn cặp nào chồng lấn — kẹp biên lần cuối rồi dừng sớm
+            np.clip(pos, clamp_lo, clamp_hi, out=pos)
+            break
 
-                rvx = rj.vx - ri.vx
-                rvy = rj.vy - ri.vy
-                vn = rvx*nx + rvy*ny
-                if vn < 0.0:
-                    j_imp = -(1.0 + restitution) * vn * 0.5
-                    ri.vx -= nx * j_imp; ri.vy -= ny * j_imp
-                    rj.vx += nx * j_imp; rj.vy += ny * j_imp
+        d = np.sqrt(d2)
 
-        for r in robots:
-            clamp_robot_inside_field(world, r)
+        # pháp tuyến i→j; cặp trùng tâm nhận hướng ngẫu nhiên
+        nvec = np.empty((i.size, 2), dtype=np.float64)
+        ok = d > 1e-9
+        np.divide(dxy[:, 0], d, out=nvec[:, 0], where=ok)
+        np.divide(dxy[:, 1], d, out=nvec[:, 1], where=ok)
+        if not ok.all():
+            for k in np.nonzero(~ok)[0]:
+                ang = random.random() * 2.0 * math.pi
+                nvec[k, 0] = math.cos(ang)
+                nvec[k, 1] = math.sin(ang)
+
+        push = np.minimum(0.5 * (min_d - d), limit_push_per_iter)
+        np.add.at(pos, i, -push[:, None] * nvec)
+        np.add.at(pos, j, push[:, None] * nvec)
+
+        # xung lượng tách theo pháp tuyến nếu hai robot đang tiến vào nhau
+        rv = vel[j] - vel[i]
+        vn = rv[:, 0] * nvec[:, 0] + rv[:, 1] * nvec[:, 1]
+        imp = np.where(vn < 0.0, -(1.0 + restitution) * vn * 0.5, 0.0)
+        np.add.at(vel, i, -imp[:, None] * nvec)
+        np.add.at(vel, j, imp[:, None] * nvec)
+
+        np.clip(pos, clamp_lo, clamp_hi, out=pos)
+
+    # --- scatter về robot (1 lần/call) ---
+    for idx, r in enumerate(robots):
+        r.x = pos[idx, 0]
+        r.y = pos[idx, 1]
+        r.vx = vel[idx, 0]
+        r.vy = vel[idx, 1]
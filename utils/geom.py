@@ -6,6 +6,11 @@ from PyQt5.QtCore import QPointF
 # các hằng theo *m* và px
 from config.constants import FIELD_W, FIELD_H, SCALE, MARGIN
 
+# tâm sân theo px với SCALE mặc định — tính 1 lần lúc import, đường nhanh
+# của m2px/px2m khỏi nhân lại mỗi lần gọi
+_CX = MARGIN + (FIELD_W * SCALE) * 0.5
+_CY = MARGIN + (FIELD_H * SCALE) * 0.5
+
 def m2px(x_m: float, y_m: float, *, scale: Optional[float] = None) -> QPointF:
     """
     World (m, gốc giữa, +y lên) -> Pixel (gốc trên-trái, +y xuống)
@@ -13,10 +18,16 @@ def m2px(x_m: float, y_m: float, *, scale: Optional[float] = None) -> QPointF:
     - x_px = center_x + x_m * SCALE
     - y_px = center_y - y_m * SCALE
     """
-    s = SCALE if scale is None else scale
-    cx = MARGIN + (FIELD_W * s) * 0.5
-    cy = MARGIN + (FIELD_H * s) * 0.5
-    return QPointF(cx + x_m * s, cy - y_m * s)
+    if scale is None:  # đường nóng: hằng đã precompute
+        return QPointF(_CX + x_m * SCALE, _CY - y_m * SCALE)
+    cx = MARGIN + (FIELD_W * scale) * 0.5
+    cy = MARGIN + (FIELD_H * scale) * 0.5
+    return QPointF(cx + x_m * scale, cy - y_m * scale)
+
+def m2px_array(xs, ys):
+    """Bản batch của m2px (SCALE mặc định): nhận/trả ndarray (x_px, y_px) —
+    để lớp vẽ cập nhật cả loạt item bằng 2 biểu thức numpy thay vì n QPointF."""
+    return (xs * SCALE + _CX, _CY - ys * SCALE)
 
 def len_m2px(l_m: float, *, scale: Optional[float] = None) -> float:
     s = SCALE if scale is None else scale
@@ -24,7 +35,8 @@ def len_m2px(l_m: float, *, scale: Optional[float] = None) -> float:
 
 # (nếu cần chiều ngược lại)
 def px2m(x_px: float, y_px: float, *, scale: Optional[float] = None):
-    s = SCALE if scale is None else scale
-    cx = MARGIN + (FIELD_W * s) * 0.5
-    cy = MARGIN + (FIELD_H * s) * 0.5
-    return ((x_px - cx) / s, -(y_px - cy) / s)
+    if scale is None:
+        return ((x_px - _CX) / SCALE, -(y_px - _CY) / SCALE)
+    cx = MARGIN + (FIELD_W * scale) * 0.5
+    cy = MARGIN + (FIELD_H * scale) * 0.5
+    return ((x_px - cx) / scale, -(y_px - cy) / scale)